@@ -6,6 +6,7 @@ live here. No other module defines configuration values.
 
 from __future__ import annotations
 
+import functools
 import os
 from pathlib import Path
 
@@ -36,6 +37,12 @@ MAX_RESEARCH_VALIDATE_ITERATIONS = _int_env("MAX_RESEARCH_VALIDATE_ITERATIONS",
 RATE_LIMIT_REQUESTS_PER_MINUTE = _int_env("RATE_LIMIT_REQUESTS_PER_MINUTE", 30)
 EXTRACT_CONTENT_CHAR_LIMIT = _int_env("EXTRACT_CONTENT_CHAR_LIMIT", 300_000)
 CRAWL_CONTENT_TRUNCATE_CHARS = _int_env("CRAWL_CONTENT_TRUNCATE_CHARS", 5_000)
+MAX_CONCURRENT_CRAWLS = _int_env("MAX_CONCURRENT_CRAWLS", 8)
+
+# --- Crawl Cache ---
+
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", ".crawl-cache")
+CRAWL_CACHE_TTL_SECONDS = _int_env("CRAWL_CACHE_TTL_SECONDS", 86_400)
 
 # --- Queue Names ---
 
@@ -57,8 +64,11 @@ LLM_MODEL = os.getenv("LLM_MODEL", "openrouter:openai/gpt-4o-mini")
 
 
 # --- Config Loaders ---
+# The YAML files are read once per process; callers share the returned
+# dicts and must not mutate them.
 
 
+@functools.cache
 def load_sources_config() -> dict:
     """Load source priority configuration from config/sources.yml."""
     sources_path = AGENT_DIR / "config" / "sources.yml"
@@ -84,8 +94,13 @@ def get_all_trusted_domains() -> list[str]:
     return domains
 
 
+@functools.lru_cache(maxsize=1024)
 def get_source_tier_for_domain(domain: str) -> str | None:
-    """Return the tier name for a domain, or None if not recognized."""
+    """Return the tier name for a domain, or None if not recognized.
+
+    Memoized per domain, since every crawled URL is classified. The cache
+    is bounded because crawled domains are not.
+    """
     for tier_name, tier_domains in get_source_domains_by_tier().items():
         for tier_domain in tier_domains:
             if tier_domain in domain or domain in tier_domain:
@@ -101,6 +116,7 @@ def get_source_weight(tier_name: str) -> float:
     return tier.get("weight", 0.0)
 
 
+@functools.cache
 def load_research_topics() -> dict:
     """Load research topic configuration from config/research_topics.yml.
 
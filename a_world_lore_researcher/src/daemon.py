@@ -41,6 +41,7 @@ from src.models import (
     ZoneFailure,
 )
 from src.logging_config import setup_logging
+from src.mcp_client import close_crawl_client
 from src.pipeline import PIPELINE_STEPS, run_pipeline
 
 logger = logging.getLogger(__name__)
@@ -394,7 +395,7 @@ class Daemon:
                 await asyncio.sleep(delay)
 
     async def _shutdown(self):
-        """Clean shutdown — close RabbitMQ connections."""
+        """Clean shutdown — close RabbitMQ connections and the crawl client."""
         logger.info("daemon_shutdown")
         self._running = False
 
@@ -408,6 +409,10 @@ class Daemon:
                 await self._connection.close()
             except Exception:
                 logger.warning("connection_close_failed", exc_info=True)
+        try:
+            await close_crawl_client()
+        except Exception:
+            logger.warning("crawl_client_close_failed", exc_info=True)
 
     def _setup_signal_handlers(self):
         loop = asyncio.get_running_loop()
@@ -10,18 +10,37 @@ The per-call overhead is negligible for a job-driven daemon.
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 
+import diskcache
 import httpx
+import orjson
 from mcp.client.session import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.types import TextContent
 
-from src.config import MCP_WEB_CRAWLER_URL
+from src.config import (
+    CRAWL_CACHE_DIR,
+    CRAWL_CACHE_TTL_SECONDS,
+    MAX_CONCURRENT_CRAWLS,
+    MCP_WEB_CRAWLER_URL,
+)
 
 logger = logging.getLogger(__name__)
 
+# The agent may issue several crawl tool calls at once; cap how many reach
+# crawl4ai together so a burst neither queues up browser pages nor
+# hammers the target hosts
+_crawl_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CRAWLS)
+
+# Successfully crawled markdown by URL, expiring after CRAWL_CACHE_TTL_SECONDS
+_crawl_cache: diskcache.Cache | None = None
+
+# One client for all crawl4ai requests, so connections are kept alive
+# between crawls instead of being opened per page
+_crawl_client: httpx.AsyncClient | None = None
+
 
 # ---------------------------------------------------------------------------
 # MCP StreamableHTTP calls
@@ -59,30 +78,74 @@ async def mcp_call(
 # ---------------------------------------------------------------------------
 
 
+def _get_crawl_cache() -> diskcache.Cache | None:
+    """Lazy-open the on-disk crawl cache. None when CRAWL_CACHE_TTL_SECONDS is 0."""
+    global _crawl_cache
+    if _crawl_cache is None and CRAWL_CACHE_TTL_SECONDS > 0:
+        _crawl_cache = diskcache.Cache(CRAWL_CACHE_DIR)
+    return _crawl_cache
+
+
+def _get_crawl_client() -> httpx.AsyncClient:
+    """Lazy-init the shared crawl4ai HTTP client."""
+    global _crawl_client
+    if _crawl_client is None:
+        _crawl_client = httpx.AsyncClient(
+            timeout=120.0,
+            limits=httpx.Limits(max_connections=MAX_CONCURRENT_CRAWLS),
+        )
+    return _crawl_client
+
+
+async def close_crawl_client() -> None:
+    """Close the shared crawl4ai client. Called on daemon shutdown."""
+    global _crawl_client
+    if _crawl_client is not None:
+        await _crawl_client.aclose()
+        _crawl_client = None
+
+
 async def crawl_url(url: str, include_links: bool = True, include_tables: bool = True) -> dict:
     """Crawl a single URL via crawl4ai's REST API and return markdown content.
 
     Uses the /md endpoint. include_links/include_tables kept for interface
     compatibility but crawl4ai handles content extraction holistically.
+    At most MAX_CONCURRENT_CRAWLS crawls run at once. Pages crawled within
+    CRAWL_CACHE_TTL_SECONDS are served from the disk cache without a request.
     """
+    cache = _get_crawl_cache()
+    if cache is not None:
+        content = cache.get(url)
+        if content is not None:
+            return {"url": url, "title": "", "content": content, "error": None}
+
+    async with _crawl_semaphore:
+        result = await _crawl_url(url)
+
+    if cache is not None and result["content"]:
+        cache.set(url, result["content"], expire=CRAWL_CACHE_TTL_SECONDS)
+    return result
+
+
+async def _crawl_url(url: str) -> dict:
+    """Request one page's markdown from crawl4ai. Errors become result dicts."""
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{MCP_WEB_CRAWLER_URL}/md",
-                json={"url": url, "f": "raw", "c": "0"},
-            )
+        response = await _get_crawl_client().post(
+            f"{MCP_WEB_CRAWLER_URL}/md",
+            json={"url": url, "f": "raw", "c": "0"},
+        )
 
-            if response.status_code != 200:
-                logger.warning("crawl4ai returned %s for %s", response.status_code, url)
-                return {"url": url, "title": "", "content": None, "error": f"HTTP {response.status_code}"}
+        if response.status_code != 200:
+            logger.warning("crawl4ai returned %s for %s", response.status_code, url)
+            return {"url": url, "title": "", "content": None, "error": f"HTTP {response.status_code}"}
 
-            data = response.json()
-            markdown = data.get("markdown", "")
+        data = response.json()
+        markdown = data.get("markdown", "")
 
-            if not markdown:
-                return {"url": url, "title": "", "content": None, "error": "No content extracted"}
+        if not markdown:
+            return {"url": url, "title": "", "content": None, "error": "No content extracted"}
 
-            return {"url": url, "title": "", "content": markdown, "error": None}
+        return {"url": url, "title": "", "content": markdown, "error": None}
 
     except httpx.HTTPError as exc:
         logger.warning("crawl4ai HTTP error for %s: %s", url, exc)
@@ -113,15 +176,15 @@ def _parse_result(result) -> dict | list | str | None:
 
     if len(texts) == 1:
         try:
-            return json.loads(texts[0])
-        except (json.JSONDecodeError, TypeError):
+            return orjson.loads(texts[0])
+        except (orjson.JSONDecodeError, TypeError):
             return texts[0]
 
     parsed = []
     for text in texts:
         try:
-            parsed.append(json.loads(text))
-        except (json.JSONDecodeError, TypeError):
+            parsed.append(orjson.loads(text))
+        except (orjson.JSONDecodeError, TypeError):
             parsed.append(text)
     return parsed
 
@@ -3,11 +3,14 @@
 from src.config import (
     AGENT_ID,
     AGENT_ROLE,
+    CRAWL_CACHE_DIR,
+    CRAWL_CACHE_TTL_SECONDS,
     CRAWL_CONTENT_TRUNCATE_CHARS,
     DAILY_TOKEN_BUDGET,
     EXTRACT_CONTENT_CHAR_LIMIT,
     GAME_NAME,
     JOB_QUEUE,
+    MAX_CONCURRENT_CRAWLS,
     MAX_RESEARCH_VALIDATE_ITERATIONS,
     MCP_STORAGE_URL,
     MCP_SUMMARIZER_URL,
@@ -41,6 +44,7 @@ class TestEnvVarDefaults:
 
     def test_rate_limiting(self):
         assert RATE_LIMIT_REQUESTS_PER_MINUTE == 30
+        assert MAX_CONCURRENT_CRAWLS == 8
 
     def test_validation(self):
         assert MAX_RESEARCH_VALIDATE_ITERATIONS == 3
@@ -62,6 +66,8 @@ class TestEnvVarDefaults:
     def test_centralized_constants(self):
         assert EXTRACT_CONTENT_CHAR_LIMIT == 300_000
         assert CRAWL_CONTENT_TRUNCATE_CHARS == 5_000
+        assert CRAWL_CACHE_DIR == ".crawl-cache"
+        assert CRAWL_CACHE_TTL_SECONDS == 86_400
         assert VALIDATOR_QUEUE == "agent.world_lore_validator"
 
 
@@ -71,6 +77,9 @@ class TestSourcesConfig:
         assert config["game"] == "wow"
         assert "source_tiers" in config
 
+    def test_load_sources_config_read_once(self):
+        assert load_sources_config() is load_sources_config()
+
     def test_get_source_domains_by_tier(self):
         tiers = get_source_domains_by_tier()
         assert "official" in tiers
@@ -1,7 +1,9 @@
 """Tests for MCP client helpers — StreamableHTTP calls and crawl4ai REST API."""
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import diskcache
 import pytest
 
 from src.mcp_client import _extract_all_text, _parse_result, crawl_url, mcp_call
@@ -154,6 +156,14 @@ class TestMcpCall:
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(autouse=True)
+def isolated_crawl_cache(tmp_path):
+    """Give each test its own empty on-disk crawl cache."""
+    with diskcache.Cache(str(tmp_path / "crawl-cache")) as cache, \
+            patch("src.mcp_client._crawl_cache", cache):
+        yield cache
+
+
 class TestCrawlUrl:
     @pytest.mark.asyncio
     async def test_successful_crawl(self):
@@ -161,12 +171,9 @@ class TestCrawlUrl:
         mock_response.status_code = 200
         mock_response.json.return_value = {"markdown": "# Page Content"}
 
-        with patch("src.mcp_client.httpx.AsyncClient") as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.post = AsyncMock(return_value=mock_response)
-            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
-
+        mock_client = AsyncMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        with patch("src.mcp_client._crawl_client", mock_client):
             result = await crawl_url("https://example.com/page")
 
         assert result["content"] == "# Page Content"
@@ -177,12 +184,9 @@ class TestCrawlUrl:
         mock_response = MagicMock()
         mock_response.status_code = 503
 
-        with patch("src.mcp_client.httpx.AsyncClient") as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.post = AsyncMock(return_value=mock_response)
-            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
-
+        mock_client = AsyncMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        with patch("src.mcp_client._crawl_client", mock_client):
             result = await crawl_url("https://example.com/page")
 
         assert result["content"] is None
@@ -194,12 +198,9 @@ class TestCrawlUrl:
         mock_response.status_code = 200
         mock_response.json.return_value = {"markdown": ""}
 
-        with patch("src.mcp_client.httpx.AsyncClient") as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.post = AsyncMock(return_value=mock_response)
-            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
-
+        mock_client = AsyncMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        with patch("src.mcp_client._crawl_client", mock_client):
             result = await crawl_url("https://example.com/empty")
 
         assert result["content"] is None
@@ -209,13 +210,83 @@ class TestCrawlUrl:
     async def test_connection_error(self):
         import httpx
 
-        with patch("src.mcp_client.httpx.AsyncClient") as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.post = AsyncMock(side_effect=httpx.ConnectError("refused"))
-            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
-
+        mock_client = AsyncMock()
+        mock_client.post = AsyncMock(side_effect=httpx.ConnectError("refused"))
+        with patch("src.mcp_client._crawl_client", mock_client):
             result = await crawl_url("https://example.com/down")
 
         assert result["content"] is None
         assert result["error"] is not None
+
+    @pytest.mark.asyncio
+    async def test_repeat_crawl_served_from_cache(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"markdown": "# Page Content"}
+
+        mock_client = AsyncMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        with patch("src.mcp_client._crawl_client", mock_client):
+            first = await crawl_url("https://example.com/page")
+            second = await crawl_url("https://example.com/page")
+
+        assert first == second
+        assert second["content"] == "# Page Content"
+        mock_client.post.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_crawl_not_cached(self, isolated_crawl_cache):
+        mock_response = MagicMock()
+        mock_response.status_code = 503
+
+        mock_client = AsyncMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        with patch("src.mcp_client._crawl_client", mock_client):
+            await crawl_url("https://example.com/page")
+
+        assert "https://example.com/page" not in isolated_crawl_cache
+
+    @pytest.mark.asyncio
+    async def test_cache_disabled_with_zero_ttl(self):
+        with patch("src.mcp_client._crawl_cache", None), \
+                patch("src.mcp_client.CRAWL_CACHE_TTL_SECONDS", 0):
+            from src.mcp_client import _get_crawl_cache
+
+            assert _get_crawl_cache() is None
+
+    @pytest.mark.asyncio
+    async def test_crawl_client_shared_and_closed(self):
+        from src.mcp_client import _get_crawl_client, close_crawl_client
+
+        with patch("src.mcp_client._crawl_client", None):
+            client = _get_crawl_client()
+            assert _get_crawl_client() is client
+            await close_crawl_client()
+            assert client.is_closed
+            assert _get_crawl_client() is not client
+            await close_crawl_client()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_crawls_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def slow_post(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {"markdown": "# Page"}
+            return response
+
+        mock_client = AsyncMock()
+        mock_client.post = slow_post
+        with patch("src.mcp_client._crawl_semaphore", asyncio.Semaphore(2)), \
+                patch("src.mcp_client._crawl_client", mock_client):
+            results = await asyncio.gather(*(crawl_url(f"https://example.com/{i}") for i in range(6)))
+
+        assert all(r["content"] == "# Page" for r in results)
+        assert peak == 2
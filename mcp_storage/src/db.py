@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import os
-from datetime import datetime
 from typing import Any
 
+import orjson
 from surrealdb import AsyncSurreal
 
 SURREALDB_URL = os.getenv("SURREALDB_URL", "ws://localhost:8010/rpc")
@@ -16,19 +16,29 @@ SURREALDB_NAMESPACE = os.getenv("SURREALDB_NAMESPACE", "mythline")
 SURREALDB_DATABASE = os.getenv("SURREALDB_DATABASE", "world_lore")
 
 _db_instance: AsyncSurreal | None = None
+_db_init_lock = asyncio.Lock()
 
 
 async def get_db() -> AsyncSurreal:
     """Get or create the SurrealDB connection singleton.
 
+    The WebSocket connection is opened once and shared by every tool call;
+    the RPC protocol multiplexes in-flight queries, so independent calls
+    can be issued concurrently (e.g. with asyncio.gather) without a pool.
+    The lock only serializes the first connect.
+
     Returns a connected and authenticated AsyncSurreal instance.
     """
     global _db_instance
-    if _db_instance is None:
-        _db_instance = AsyncSurreal(SURREALDB_URL)
-        await _db_instance.connect()
-        await _db_instance.signin({"username": SURREALDB_USER, "password": SURREALDB_PASS})
-        await _db_instance.use(SURREALDB_NAMESPACE, SURREALDB_DATABASE)
+    if _db_instance is not None:
+        return _db_instance
+    async with _db_init_lock:
+        if _db_instance is None:
+            db = AsyncSurreal(SURREALDB_URL)
+            await db.connect()
+            await db.signin({"username": SURREALDB_USER, "password": SURREALDB_PASS})
+            await db.use(SURREALDB_NAMESPACE, SURREALDB_DATABASE)
+            _db_instance = db
     return _db_instance
 
 
@@ -45,27 +55,31 @@ def _first(result: Any) -> dict | None:
 
     SurrealDB select() returns a list for table selects and a dict for
     record selects, but behavior varies. This normalizes the result.
+    Indexing is attempted directly since a list is the common shape.
     """
-    if isinstance(result, list):
-        return result[0] if result else None
-    return result
+    try:
+        return result[0]
+    except IndexError:
+        return None
+    except (KeyError, TypeError):
+        return result
 
 
-class SurrealEncoder(json.JSONEncoder):
-    """JSON encoder that handles SurrealDB-specific types.
+def _encode_surreal(o: Any) -> Any:
+    """orjson default hook for SurrealDB-specific types.
 
-    SurrealDB returns RecordID objects for 'id' fields and may return
-    datetime objects. This encoder converts them to strings.
+    SurrealDB returns RecordID objects for 'id' fields; these become
+    "table:id" strings. datetime values are serialized natively by orjson.
     """
-
-    def default(self, o: Any) -> Any:
-        if hasattr(o, "table_name") and hasattr(o, "id"):
-            return f"{o.table_name}:{o.id}"
-        if isinstance(o, datetime):
-            return o.isoformat()
-        return super().default(o)
+    if hasattr(o, "table_name") and hasattr(o, "id"):
+        return f"{o.table_name}:{o.id}"
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
 
 
 def to_json(obj: Any) -> str:
-    """Serialize an object to JSON, handling SurrealDB types."""
-    return json.dumps(obj, cls=SurrealEncoder)
+    """Serialize an object to JSON, handling SurrealDB types.
+
+    orjson leaves non-ASCII text unescaped, so lore content in other
+    scripts is not inflated by \\uXXXX sequences on the wire.
+    """
+    return orjson.dumps(obj, default=_encode_surreal).decode()
@@ -8,12 +8,25 @@ the actual embedding generation is delegated to shared/embedding.py.
 from __future__ import annotations
 
 import logging
+import math
 
 from shared.embedding import create_embedding_provider, EmbeddingProvider
 
 logger = logging.getLogger(__name__)
 
-EMBEDDABLE_TABLES = {"zone", "npc", "faction", "lore", "narrative_item"}
+# Fields combined into each table's embeddable text, in order
+EMBEDDING_FIELDS: dict[str, tuple[str, ...]] = {
+    "zone": ("name", "narrative_arc", "political_climate", "era"),
+    "npc": ("name", "personality", "motivations", "role"),
+    "faction": ("name", "ideology", "goals", "level"),
+    "lore": ("title", "category", "content"),
+    "narrative_item": ("name", "story_arc", "power_description", "significance"),
+}
+
+EMBEDDABLE_TABLES = frozenset(EMBEDDING_FIELDS)
+
+# Stored embeddings are scalar-quantized to the int8 range
+_QUANT_MAX = 127
 
 _provider: EmbeddingProvider | None = None
 
@@ -30,66 +43,68 @@ def _build_embeddable_text(table: str, data: dict) -> str:
     """Build a text representation of a record suitable for embedding.
 
     Combines the most semantically meaningful fields into a single
-    string for vector encoding. Different tables emphasize different fields.
+    string for vector encoding. Different tables emphasize different
+    fields (see EMBEDDING_FIELDS); list fields are joined with spaces.
     """
     parts = []
-
-    if table == "zone":
-        parts = [
-            data.get("name", ""),
-            data.get("narrative_arc", ""),
-            data.get("political_climate", ""),
-            data.get("era", ""),
-        ]
-    elif table == "npc":
-        parts = [
-            data.get("name", ""),
-            data.get("personality", ""),
-            " ".join(data.get("motivations", [])),
-            data.get("role", ""),
-        ]
-    elif table == "faction":
-        parts = [
-            data.get("name", ""),
-            data.get("ideology", ""),
-            " ".join(data.get("goals", [])),
-            data.get("level", ""),
-        ]
-    elif table == "lore":
-        parts = [
-            data.get("title", ""),
-            data.get("category", ""),
-            data.get("content", ""),
-        ]
-    elif table == "narrative_item":
-        parts = [
-            data.get("name", ""),
-            data.get("story_arc", ""),
-            data.get("power_description", ""),
-            data.get("significance", ""),
-        ]
+    for field in EMBEDDING_FIELDS.get(table, ()):
+        value = data.get(field, "")
+        if isinstance(value, list):
+            value = " ".join(value)
+        parts.append(value)
 
     return " ".join(p for p in parts if p).strip()
 
 
+def _normalize(vector: list[float]) -> list[float]:
+    """Scale a vector to unit length.
+
+    Unit vectors let search use a plain dot product, which equals cosine
+    similarity without dividing by both magnitudes on every comparison.
+    """
+    norm = math.sqrt(math.fsum(x * x for x in vector))
+    if norm == 0.0:
+        return vector
+    return [x / norm for x in vector]
+
+
+def quantize_embedding(vector: list[float]) -> tuple[list[int], float]:
+    """Scalar-quantize a vector to the int8 range.
+
+    Each component becomes round(x / scale) with scale = max(|x|) / 127,
+    a quarter of the size of float32 storage. Cosine ranking is unaffected
+    by the scale; multiplying a dot product of two quantized vectors by
+    both scales recovers the float dot product.
+
+    Returns:
+        The integer components and the scale that maps them back.
+    """
+    peak = max((abs(x) for x in vector), default=0.0)
+    if peak == 0.0:
+        return [0] * len(vector), 0.0
+    scale = peak / _QUANT_MAX
+    return [round(x / scale) for x in vector], scale
+
+
 async def generate_embedding(text: str) -> list[float] | None:
-    """Generate an embedding vector via the configured provider.
+    """Generate a unit-length embedding vector via the configured provider.
 
     Returns None if the provider is not configured or the call fails.
     """
     try:
         provider = _get_provider()
-        return await provider.embed(text)
+        return _normalize(await provider.embed(text))
     except Exception:
         logger.debug("Embedding generation failed", exc_info=True)
         return None
 
 
 async def enrich_with_embedding(table: str, data: dict) -> dict:
-    """Add an embedding vector to a record if the table supports it.
+    """Add a quantized embedding vector to a record if the table supports it.
 
-    Returns the data dict with an 'embedding' field added, or the
-    original data if embedding generation fails or is not applicable.
+    Returns the data dict with 'embedding' (int8-range components) and
+    'embedding_scale' fields added, or the original data if embedding
+    generation fails or is not applicable.
     """
     if table not in EMBEDDABLE_TABLES:
         return data
@@ -100,6 +115,6 @@ async def enrich_with_embedding(table: str, data: dict) -> dict:
 
     embedding = await generate_embedding(text)
     if embedding:
-        data["embedding"] = embedding
+        data["embedding"], data["embedding_scale"] = quantize_embedding(embedding)
 
     return data
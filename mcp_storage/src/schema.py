@@ -2,6 +2,19 @@
 
 from src.db import get_db
 
+# Quantizes rows stored before embeddings were quantized: float vectors
+# without an embedding_scale. Mirrors quantize_embedding() on the
+# normalized vector; normalizing only changes the scale, since the
+# components are rounded relative to the largest one.
+_QUANTIZE_FLOAT_EMBEDDINGS = (
+    "UPDATE {table} SET "
+    "embedding_scale = math::max(array::map(embedding, |$y| math::abs($y))) / vector::magnitude(embedding) / 127, "
+    "embedding = array::map(embedding, |$x| <int> math::round($x * 127 / math::max(array::map(embedding, |$y| math::abs($y))))) "
+    "WHERE embedding != NONE AND embedding_scale = NONE "
+    "AND math::max(array::map(embedding, |$y| math::abs($y))) > 0 "
+    "RETURN NONE"
+)
+
 SCHEMA_STATEMENTS = [
     # --- Tables ---
     "DEFINE TABLE IF NOT EXISTS zone SCHEMALESS",
@@ -21,12 +34,22 @@ SCHEMA_STATEMENTS = [
     "DEFINE TABLE IF NOT EXISTS found_in TYPE RELATION IN narrative_item OUT zone",
     "DEFINE TABLE IF NOT EXISTS about TYPE RELATION IN lore OUT zone",
 
-    # --- Vector indexes (MTREE, validated in PoC) ---
-    "DEFINE INDEX IF NOT EXISTS idx_zone_embedding ON zone FIELDS embedding MTREE DIMENSION 1536 DIST COSINE TYPE F32",
-    "DEFINE INDEX IF NOT EXISTS idx_npc_embedding ON npc FIELDS embedding MTREE DIMENSION 1536 DIST COSINE TYPE F32",
-    "DEFINE INDEX IF NOT EXISTS idx_faction_embedding ON faction FIELDS embedding MTREE DIMENSION 1536 DIST COSINE TYPE F32",
-    "DEFINE INDEX IF NOT EXISTS idx_lore_embedding ON lore FIELDS embedding MTREE DIMENSION 1536 DIST COSINE TYPE F32",
-    "DEFINE INDEX IF NOT EXISTS idx_narrative_item_embedding ON narrative_item FIELDS embedding MTREE DIMENSION 1536 DIST COSINE TYPE F32",
+    # --- Vector indexes (HNSW over int8-quantized embeddings, KNN via <|k,ef|>) ---
+    # HNSW has no 8-bit element type, so I16 is the narrowest that holds the
+    # quantized components. The MTREE indexes from earlier deployments are
+    # dropped so the KNN operator resolves to these, and their float
+    # embeddings are quantized in place before the new indexes are built.
+    "REMOVE INDEX IF EXISTS idx_zone_embedding ON zone",
+    "REMOVE INDEX IF EXISTS idx_npc_embedding ON npc",
+    "REMOVE INDEX IF EXISTS idx_faction_embedding ON faction",
+    "REMOVE INDEX IF EXISTS idx_lore_embedding ON lore",
+    "REMOVE INDEX IF EXISTS idx_narrative_item_embedding ON narrative_item",
+    *(_QUANTIZE_FLOAT_EMBEDDINGS.format(table=table) for table in ("zone", "npc", "faction", "lore", "narrative_item")),
+    "DEFINE INDEX IF NOT EXISTS idx_zone_embedding_q ON zone FIELDS embedding HNSW DIMENSION 1536 DIST COSINE TYPE I16 EFC 64 M 16",
+    "DEFINE INDEX IF NOT EXISTS idx_npc_embedding_q ON npc FIELDS embedding HNSW DIMENSION 1536 DIST COSINE TYPE I16 EFC 64 M 16",
+    "DEFINE INDEX IF NOT EXISTS idx_faction_embedding_q ON faction FIELDS embedding HNSW DIMENSION 1536 DIST COSINE TYPE I16 EFC 64 M 16",
+    "DEFINE INDEX IF NOT EXISTS idx_lore_embedding_q ON lore FIELDS embedding HNSW DIMENSION 1536 DIST COSINE TYPE I16 EFC 64 M 16",
+    "DEFINE INDEX IF NOT EXISTS idx_narrative_item_embedding_q ON narrative_item FIELDS embedding HNSW DIMENSION 1536 DIST COSINE TYPE I16 EFC 64 M 16",
 ]
 
 
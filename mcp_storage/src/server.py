@@ -1,25 +1,29 @@
 """Storage MCP Service — SurrealDB backend for world lore and research state."""
 
-import json
 import os
 from datetime import datetime, timezone
 from typing import Any
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 
 from src.db import get_db, close_db, _first, to_json
-from src.embedding import enrich_with_embedding, EMBEDDABLE_TABLES
+from src.embedding import (
+    enrich_with_embedding, generate_embedding, quantize_embedding,
+    EMBEDDABLE_TABLES, EMBEDDING_FIELDS,
+)
 from src.schema import initialize_schema
 
 MCP_STORAGE_PORT = int(os.getenv("MCP_STORAGE_PORT", "8005"))
+KNN_EF_SEARCH = int(os.getenv("KNN_EF_SEARCH", "40"))
 
 server = FastMCP(name="Storage Service", host="0.0.0.0", port=MCP_STORAGE_PORT)
 
-VALID_TABLES = {"zone", "npc", "faction", "lore", "narrative_item"}
-VALID_RELATIONS = {
+VALID_TABLES = frozenset({"zone", "npc", "faction", "lore", "narrative_item"})
+VALID_RELATIONS = frozenset({
     "connects_to", "belongs_to", "located_in", "relates_to",
     "child_of", "stance_toward", "found_in", "about",
-}
+})
 
 
 # --- Lifecycle ---
@@ -58,27 +62,27 @@ async def create_record(table: str, record_id: str, data: str) -> str:
         JSON string of the created record.
     """
     if table not in VALID_TABLES:
-        raise ValueError(f"Invalid table: {table}. Must be one of {VALID_TABLES}")
+        raise ValueError(f"Invalid table: {table}. Must be one of {', '.join(sorted(VALID_TABLES))}")
 
-    parsed = json.loads(data)
+    parsed = _parse_json_object(data, "data")
     parsed["updated_at"] = datetime.now(timezone.utc).isoformat()
 
     parsed = await enrich_with_embedding(table, parsed)
 
     db = await get_db()
-    thing = f"{table}:{record_id}"
+    params = {"t": table, "id": record_id}
 
     if parsed.get("embedding"):
         # SurrealDB SDK doesn't reliably index vectors inserted via create().
         # Use raw SurrealQL CREATE with embedding as a literal array.
         embedding = parsed.pop("embedding")
-        embedding_json = json.dumps(embedding)
-        result = await db.query(f"CREATE {thing} CONTENT $data", {"data": parsed})
-        await db.query(f"UPDATE {thing} SET embedding = {embedding_json}")
+        embedding_json = orjson.dumps(embedding).decode()
+        await db.query("CREATE type::thing($t, $id) CONTENT $data", {**params, "data": parsed})
+        await db.query(f"UPDATE type::thing($t, $id) SET embedding = {embedding_json}", params)
     else:
-        result = await db.query(f"CREATE {thing} CONTENT $data", {"data": parsed})
+        await db.query("CREATE type::thing($t, $id) CONTENT $data", {**params, "data": parsed})
 
-    final = _first(await db.select(thing))
+    final = _first(await db.query("SELECT * FROM type::thing($t, $id)", params))
     return to_json(final)
 
 
@@ -94,10 +98,12 @@ async def get_record(table: str, record_id: str) -> str:
         JSON string of the record, or null if not found.
     """
     if table not in VALID_TABLES:
-        raise ValueError(f"Invalid table: {table}. Must be one of {VALID_TABLES}")
+        raise ValueError(f"Invalid table: {table}. Must be one of {', '.join(sorted(VALID_TABLES))}")
 
     db = await get_db()
-    result = await db.select(f"{table}:{record_id}")
+    result = await db.query(
+        "SELECT * FROM type::thing($t, $id)", {"t": table, "id": record_id}
+    )
     record = _first(result)
     return to_json(record)
 
@@ -106,7 +112,9 @@ async def get_record(table: str, record_id: str) -> str:
 async def update_record(table: str, record_id: str, data: str) -> str:
     """Update an existing record (partial merge).
 
-    Re-generates embedding if embeddable fields change.
+    Re-generates embedding if embeddable fields change. The existing
+    record is only fetched in that case; otherwise the patch is merged
+    and the updated record returned in a single query.
 
     Args:
         table: Table name (zone, npc, faction, lore, narrative_item).
@@ -117,29 +125,38 @@ async def update_record(table: str, record_id: str, data: str) -> str:
         JSON string of the updated record.
     """
     if table not in VALID_TABLES:
-        raise ValueError(f"Invalid table: {table}. Must be one of {VALID_TABLES}")
+        raise ValueError(f"Invalid table: {table}. Must be one of {', '.join(sorted(VALID_TABLES))}")
 
-    parsed = json.loads(data)
+    parsed = _parse_json_object(data, "data")
     parsed["updated_at"] = datetime.now(timezone.utc).isoformat()
 
     db = await get_db()
-    existing = _first(await db.select(f"{table}:{record_id}"))
-    if existing:
-        merged = {**existing, **parsed}
-        merged = await enrich_with_embedding(table, merged)
-        if merged.get("embedding"):
-            embedding = merged.pop("embedding")
-            embedding_json = json.dumps(embedding)
-            await db.update(f"{table}:{record_id}", merged)
-            await db.query(f"UPDATE {table}:{record_id} SET embedding = {embedding_json}")
-        else:
-            await db.update(f"{table}:{record_id}", merged)
-    else:
-        parsed = await enrich_with_embedding(table, parsed)
-        await db.query(f"CREATE {table}:{record_id} CONTENT $data", {"data": parsed})
+    params = {"t": table, "id": record_id}
+
+    embedding = None
+    if not parsed.keys().isdisjoint(EMBEDDING_FIELDS.get(table, ())):
+        existing = _first(await db.query("SELECT * FROM type::thing($t, $id)", params))
+        merged = {**existing, **parsed} if existing else dict(parsed)
+        merged.pop("embedding", None)
+        enriched = await enrich_with_embedding(table, merged)
+        embedding = enriched.get("embedding")
+        if embedding:
+            parsed["embedding_scale"] = enriched["embedding_scale"]
 
-    result = _first(await db.select(f"{table}:{record_id}"))
-    return to_json(result)
+    result = await db.query(
+        "UPSERT type::thing($t, $id) MERGE $patch RETURN AFTER",
+        {**params, "patch": parsed},
+    )
+    if embedding:
+        # SurrealDB SDK doesn't reliably index vectors written via params.
+        # Set the embedding as a literal array.
+        embedding_json = orjson.dumps(embedding).decode()
+        result = await db.query(
+            f"UPDATE type::thing($t, $id) SET embedding = {embedding_json} RETURN AFTER",
+            params,
+        )
+
+    return to_json(_first(result))
 
 
 @server.tool()
@@ -154,11 +171,11 @@ async def delete_record(table: str, record_id: str) -> str:
         Confirmation message.
     """
     if table not in VALID_TABLES:
-        raise ValueError(f"Invalid table: {table}. Must be one of {VALID_TABLES}")
+        raise ValueError(f"Invalid table: {table}. Must be one of {', '.join(sorted(VALID_TABLES))}")
 
     db = await get_db()
-    await db.delete(f"{table}:{record_id}")
-    return json.dumps({"deleted": f"{table}:{record_id}"})
+    await db.query("DELETE type::thing($t, $id)", {"t": table, "id": record_id})
+    return to_json({"deleted": f"{table}:{record_id}"})
 
 
 @server.tool()
@@ -175,15 +192,15 @@ async def query_records(table: str, filter_expr: str = "", limit: int = 50) -> s
         JSON string of matching records.
     """
     if table not in VALID_TABLES:
-        raise ValueError(f"Invalid table: {table}. Must be one of {VALID_TABLES}")
+        raise ValueError(f"Invalid table: {table}. Must be one of {', '.join(sorted(VALID_TABLES))}")
 
     query = f"SELECT * FROM {table}"
     if filter_expr:
         query += f" WHERE {filter_expr}"
-    query += f" LIMIT {limit}"
+    query += " LIMIT $limit"
 
     db = await get_db()
-    result = await db.query(query)
+    result = await db.query(query, {"limit": limit})
     return to_json(_extract_query_result(result))
 
 
@@ -191,36 +208,45 @@ async def query_records(table: str, filter_expr: str = "", limit: int = 50) -> s
 async def search_similar(table: str, text: str, top_k: int = 5) -> str:
     """Search for records similar to the given text using vector similarity.
 
-    Uses cosine similarity on the embedding field. Works on any embeddable
+    Candidates come from the table's HNSW index via the KNN operator.
+    Embeddings are unit length before int8 quantization, so the rescaled
+    dot product approximates cosine similarity. Works on any embeddable
     table (zone, npc, faction, lore, narrative_item).
 
     Args:
         table: Table name to search.
         text: The search text to find similar records for.
-        top_k: Number of results to return.
+        top_k: Number of results to return. Must be at least 1.
 
     Returns:
         JSON string of similar records with similarity scores.
     """
     if table not in EMBEDDABLE_TABLES:
         raise ValueError(f"Table {table} does not support vector search")
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
 
-    from src.embedding import generate_embedding
     query_embedding = await generate_embedding(text)
     if not query_embedding:
-        return json.dumps([])
+        return to_json([])
+
+    # Quantize like the stored vectors; the scales restore the dot product
+    quantized, scale = quantize_embedding(query_embedding)
 
-    embedding_json = json.dumps(query_embedding)
+    # HNSW candidate list must be at least as large as the requested top_k.
+    # Rows without an embedding are not in the index, so the KNN operator
+    # skips them without a separate predicate.
+    ef = max(top_k, KNN_EF_SEARCH)
     query = (
-        f"SELECT *, vector::similarity::cosine(embedding, {embedding_json}) AS similarity "
+        f"SELECT *, "
+        f"vector::dot(embedding, $query_embedding) * embedding_scale * $query_scale AS similarity "
         f"FROM {table} "
-        f"WHERE embedding IS NOT NONE "
-        f"ORDER BY similarity DESC "
-        f"LIMIT {top_k}"
+        f"WHERE embedding <|{top_k},{ef}|> $query_embedding "
+        f"ORDER BY similarity DESC"
     )
 
     db = await get_db()
-    result = await db.query(query)
+    result = await db.query(query, {"query_embedding": quantized, "query_scale": scale})
     return to_json(_extract_query_result(result))
 
 
@@ -244,9 +270,9 @@ async def create_relation(
         JSON string of the created relationship.
     """
     if relation_type not in VALID_RELATIONS:
-        raise ValueError(f"Invalid relation type: {relation_type}. Must be one of {VALID_RELATIONS}")
+        raise ValueError(f"Invalid relation type: {relation_type}. Must be one of {', '.join(sorted(VALID_RELATIONS))}")
 
-    props = json.loads(properties)
+    props = _parse_json_object(properties, "properties")
     db = await get_db()
 
     if props:
@@ -277,17 +303,14 @@ async def traverse(record_id: str, relation_type: str, direction: str = "out") -
 
     db = await get_db()
     if direction == "out":
-        query = f"SELECT ->{relation_type}->?.* AS related FROM {record_id}"
+        query = f"RETURN type::thing($rec)->{relation_type}->?.*"
     elif direction == "in":
-        query = f"SELECT <-{relation_type}<-?.* AS related FROM {record_id}"
+        query = f"RETURN type::thing($rec)<-{relation_type}<-?.*"
     else:
-        query = f"SELECT <->{relation_type}<->?.* AS related FROM {record_id}"
+        query = f"RETURN type::thing($rec)<->{relation_type}<->?.*"
 
-    result = await db.query(query)
-    extracted = _extract_query_result(result)
-    if extracted and isinstance(extracted, list) and "related" in extracted[0]:
-        return to_json(extracted[0]["related"])
-    return json.dumps([])
+    result = await db.query(query, {"rec": record_id})
+    return to_json(_extract_query_result(result) or [])
 
 
 # --- Checkpoint / Research State ---
@@ -308,7 +331,7 @@ async def save_checkpoint(agent_id: str, state: str) -> str:
     Returns:
         Confirmation message.
     """
-    parsed = json.loads(state)
+    parsed = _parse_json_object(state, "state")
     parsed["saved_at"] = datetime.now(timezone.utc).isoformat()
     parsed["checkpoint_key"] = agent_id
 
@@ -318,7 +341,7 @@ async def save_checkpoint(agent_id: str, state: str) -> str:
         {"id": agent_id, "data": parsed},
     )
 
-    return json.dumps({"saved": f"research_state:{agent_id}"})
+    return to_json({"saved": f"research_state:{agent_id}"})
 
 
 @server.tool()
@@ -356,7 +379,7 @@ async def delete_checkpoint(agent_id: str) -> str:
         "DELETE type::thing('research_state', $id)",
         {"id": agent_id},
     )
-    return json.dumps({"deleted": f"research_state:{agent_id}"})
+    return to_json({"deleted": f"research_state:{agent_id}"})
 
 
 @server.tool()
@@ -385,24 +408,45 @@ async def list_checkpoints(prefix: str = "") -> str:
         )
     extracted = _extract_query_result(result)
     if not extracted or not isinstance(extracted, list):
-        return json.dumps([])
-    return json.dumps([r["checkpoint_key"] for r in extracted if isinstance(r, dict) and "checkpoint_key" in r])
+        return to_json([])
+    return to_json([r["checkpoint_key"] for r in extracted if isinstance(r, dict) and "checkpoint_key" in r])
 
 
 # --- Helpers ---
 
 
+def _parse_json_object(raw: str, name: str) -> dict:
+    """Parse a tool's JSON argument, rejecting anything but an object.
+
+    Runs before any embedding or database call so malformed payloads fail
+    without a round-trip.
+
+    Args:
+        raw: JSON string passed to the tool.
+        name: Argument name, used in the error message.
+
+    Returns:
+        The decoded JSON object.
+    """
+    try:
+        parsed = orjson.loads(raw)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in {name}: {e}") from e
+    if not isinstance(parsed, dict):
+        raise ValueError(f"{name} must be a JSON object, got {type(parsed).__name__}")
+    return parsed
+
+
 def _extract_query_result(result: Any) -> Any:
     """Extract the actual data from a SurrealDB query() response.
 
     query() wraps results in a list of dicts with 'result' and 'status' keys.
+    Any other shape is returned unchanged.
     """
-    if isinstance(result, list) and result:
-        first = result[0]
-        if isinstance(first, dict) and "result" in first:
-            return first["result"]
+    try:
+        return result[0]["result"]
+    except (KeyError, IndexError, TypeError):
         return result
-    return result
 
 
 if __name__ == "__main__":
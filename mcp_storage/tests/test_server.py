@@ -4,6 +4,7 @@ Requires SurrealDB running on ws://localhost:8010/rpc.
 Start via: cd poc/surrealdb && docker compose up -d
 """
 
+import asyncio
 import json
 from unittest.mock import patch, AsyncMock, MagicMock
 
@@ -19,6 +20,7 @@ from src.server import (
     update_record,
     delete_record,
     query_records,
+    search_similar,
     create_relation,
     traverse,
     save_checkpoint,
@@ -64,6 +66,20 @@ async def setup_db():
         await close_db()
 
 
+class TestConnection:
+    async def test_concurrent_get_db_connects_once(self, setup_db):
+        db_module._db_instance = None
+        factory = MagicMock(wraps=db_module.AsyncSurreal)
+        try:
+            with patch.object(db_module, "AsyncSurreal", factory):
+                instances = await asyncio.gather(*(get_db() for _ in range(5)))
+            assert factory.call_count == 1
+            assert all(db is instances[0] for db in instances)
+        finally:
+            await close_db()
+            db_module._db_instance = setup_db
+
+
 class TestInitialize:
     async def test_schema_initialization(self):
         result = await initialize()
@@ -117,6 +133,11 @@ class TestCRUD:
         assert updated["confidence"] == 0.85
         assert updated["name"] == "Westfall"
 
+    async def test_non_ascii_returned_unescaped(self):
+        result = await create_record("zone", "quelthalas", json.dumps({"name": "Quel'Thalas — Eversong"}))
+        assert "Quel'Thalas — Eversong" in result
+        assert json.loads(result)["id"] == "zone:quelthalas"
+
     async def test_delete_record(self):
         await create_record("zone", "deadmines", json.dumps({"name": "The Deadmines"}))
         result = await delete_record("zone", "deadmines")
@@ -148,6 +169,14 @@ class TestCRUD:
         with pytest.raises(ValueError, match="Invalid table"):
             await create_record("invalid_table", "id1", json.dumps({"test": True}))
 
+    async def test_malformed_json_raises_error(self):
+        with pytest.raises(ValueError, match="Invalid JSON in data"):
+            await create_record("zone", "bad", "{not json")
+
+    async def test_non_object_json_raises_error(self):
+        with pytest.raises(ValueError, match="must be a JSON object"):
+            await update_record("zone", "bad", json.dumps(["a", "b"]))
+
     async def test_create_all_table_types(self):
         tables_data = {
             "faction": ("horde", {"name": "The Horde", "ideology": "Strength and honor"}),
@@ -210,6 +239,12 @@ class TestGraphRelationships:
         assert len(related) == 1
         assert related[0]["name"] == "Thrall"
 
+    async def test_traverse_without_relations_returns_empty(self):
+        await create_record("zone", "isolated", json.dumps({"name": "Isolated"}))
+
+        result = await traverse("zone:isolated", "connects_to", "both")
+        assert json.loads(result) == []
+
     async def test_invalid_relation_type(self):
         with pytest.raises(ValueError, match="Invalid relation type"):
             await create_relation("invalid_rel", "zone:a", "zone:b")
@@ -302,3 +337,97 @@ class TestEmbeddingOnWrite:
 
         await save_checkpoint("test", json.dumps({"zone_name": "Test"}))
         mock_provider.embed.assert_not_called()
+
+    async def test_embedding_stored_quantized(self):
+        """Stored embeddings are normalized, then quantized to the int8 range."""
+        mock_provider = MagicMock()
+        mock_provider.embed = AsyncMock(return_value=[3.0, 4.0] + [0.0] * 1534)
+        emb_module._provider = mock_provider
+
+        await create_record("zone", "unit", json.dumps({"name": "Unit Zone"}))
+
+        db = await get_db()
+        record = _first(await db.select("zone:unit"))
+        assert record["embedding"][:3] == [95, 127, 0]
+        assert record["embedding_scale"] == pytest.approx(0.8 / 127)
+
+    async def test_initialize_quantizes_float_embeddings(self):
+        """Rows stored with float embeddings and no scale are quantized in place."""
+        db = await get_db()
+        await db.query("CREATE zone:legacy SET name = 'Legacy', embedding = $e", {"e": [0.6, 0.8] + [0.0] * 1534})
+
+        await initialize_schema()
+
+        record = _first(await db.select("zone:legacy"))
+        assert record["embedding"][:3] == [95, 127, 0]
+        assert record["embedding_scale"] == pytest.approx(0.8 / 127)
+
+    async def test_search_similar_ranks_by_similarity(self):
+        vectors = {
+            "Elwynn Forest": [1.0, 0.0] + [0.0] * 1534,
+            "Duskwood": [0.0, 2.0] + [0.0] * 1534,
+        }
+        mock_provider = MagicMock()
+        mock_provider.embed = AsyncMock(side_effect=lambda text: vectors.get(text, [5.0, 1.0] + [0.0] * 1534))
+        emb_module._provider = mock_provider
+
+        await create_record("zone", "elwynn", json.dumps({"name": "Elwynn Forest"}))
+        await create_record("zone", "duskwood", json.dumps({"name": "Duskwood"}))
+
+        result = await search_similar("zone", "forest query", top_k=2)
+        matches = json.loads(result)
+        assert [m["name"] for m in matches] == ["Elwynn Forest", "Duskwood"]
+        assert matches[0]["similarity"] == pytest.approx(5 / 26 ** 0.5)
+
+    async def test_search_similar_respects_top_k(self):
+        mock_provider = MagicMock()
+        mock_provider.embed = AsyncMock(return_value=[1.0, 1.0] + [0.0] * 1534)
+        emb_module._provider = mock_provider
+
+        for record_id in ("a", "b", "c"):
+            await create_record("zone", record_id, json.dumps({"name": f"Zone {record_id}"}))
+
+        result = await search_similar("zone", "any zone", top_k=1)
+        assert len(json.loads(result)) == 1
+
+    async def test_update_without_embeddable_fields_skips_embedding(self):
+        await create_record("zone", "goldshire", json.dumps({"name": "Goldshire"}))
+        mock_provider = MagicMock()
+        mock_provider.embed = AsyncMock(return_value=[1.0] * 1536)
+        emb_module._provider = mock_provider
+
+        result = await update_record("zone", "goldshire", json.dumps({"confidence": 0.9}))
+        updated = json.loads(result)
+        assert updated["confidence"] == 0.9
+        assert updated["name"] == "Goldshire"
+        mock_provider.embed.assert_not_called()
+
+    async def test_update_embeddable_field_reembeds_merged_record(self):
+        await create_record("zone", "redridge", json.dumps({"name": "Redridge", "game": "wow"}))
+        mock_provider = MagicMock()
+        mock_provider.embed = AsyncMock(return_value=[0.0, 2.0] + [0.0] * 1534)
+        emb_module._provider = mock_provider
+
+        result = await update_record("zone", "redridge", json.dumps({"era": "Classic"}))
+        updated = json.loads(result)
+        assert updated["game"] == "wow"
+        mock_provider.embed.assert_called_once_with("Redridge Classic")
+
+        db = await get_db()
+        record = _first(await db.select("zone:redridge"))
+        assert record["embedding"][:2] == [0, 127]
+        assert record["embedding_scale"] == pytest.approx(1 / 127)
+
+    async def test_search_similar_rejects_non_positive_top_k(self):
+        with pytest.raises(ValueError, match="top_k"):
+            await search_similar("zone", "any zone", top_k=0)
+
+    async def test_search_similar_skips_records_without_embedding(self):
+        await create_record("zone", "unembedded", json.dumps({"name": "No Vector"}))
+        mock_provider = MagicMock()
+        mock_provider.embed = AsyncMock(return_value=[1.0, 0.0] + [0.0] * 1534)
+        emb_module._provider = mock_provider
+        await create_record("zone", "embedded", json.dumps({"name": "Has Vector"}))
+
+        result = await search_similar("zone", "any zone", top_k=5)
+        assert [m["name"] for m in json.loads(result)] == ["Has Vector"]
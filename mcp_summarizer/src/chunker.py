@@ -1,13 +1,22 @@
 """Chunking engine for splitting content into LLM-sized pieces."""
 
 import re
+from bisect import bisect_right
+from collections.abc import Callable
+from itertools import accumulate
 
 from src.config import DEFAULT_CHUNK_OVERLAP_TOKENS, DEFAULT_CHUNK_SIZE_TOKENS
-from src.tokens import count_tokens, decode, encode
+from src.tokens import count_tokens, decode, encode, encode_batch
 
 # Primary boundaries: markdown headers and horizontal rules
 HEADER_PATTERN = re.compile(r"(?=^#{1,4}\s|\n-{3,}\n)", re.MULTILINE)
 
+# Top-level (h1/h2) header at the start of a section, propagated as context
+_TOP_HEADER_RE = re.compile(r"^(#{1,2}\s+.+)")
+
+# Secondary boundaries: paragraph breaks (two or more newlines)
+_PARAGRAPH_RE = re.compile(r"\n\n+")
+
 
 def _split_by_paragraphs(text: str) -> list[str]:
     """Split text at paragraph breaks (double newlines).
@@ -15,8 +24,8 @@ def _split_by_paragraphs(text: str) -> list[str]:
     Secondary boundary — used when a header-delimited section exceeds
     chunk_size but has natural paragraph breaks within it.
     """
-    parts = re.split(r"\n\n+", text)
-    return [p.strip() for p in parts if p.strip()]
+    stripped = (p.strip() for p in _PARAGRAPH_RE.split(text))
+    return [p for p in stripped if p]
 
 
 def chunk_semantic(
@@ -29,7 +38,8 @@ def chunk_semantic(
     Algorithm:
     1. Split content by headers and horizontal rules (primary boundaries).
     2. Track the header stack (most recent header at each level).
-    3. Accumulate units into chunks until approaching chunk_size.
+    3. Pack units into chunks until approaching chunk_size, choosing each
+       boundary by binary search over cumulative token counts.
     4. If a single unit exceeds chunk_size, try splitting at paragraph
        breaks (secondary boundaries) before falling back to token-based.
     5. Prepend active header context to each chunk for continuity.
@@ -40,78 +50,109 @@ def chunk_semantic(
     if not sections:
         return [content] if content.strip() else []
 
-    chunks: list[str] = []
-    current_parts: list[str] = []
-    current_tokens = 0
-    header_context = ""  # Most recent top-level header
+    # Encode each section once; the IDs are reused for oversized splits
+    section_ids = encode_batch(sections)
+    section_tokens = [len(ids) for ids in section_ids]
 
+    # Active top-level header as of each section (inclusive)
+    section_headers: list[str] = []
+    header_context = ""
     for section in sections:
-        section_tokens = count_tokens(section)
-
-        # Track header context for propagation
-        header_match = re.match(r"^(#{1,2}\s+.+)", section)
+        header_match = _TOP_HEADER_RE.match(section)
         if header_match:
             header_context = header_match.group(1)
+        section_headers.append(header_context)
 
-        if section_tokens > chunk_size:
-            # Oversized section — finalize current chunk
-            if current_parts:
-                chunks.append("\n\n".join(current_parts))
-                current_parts = []
-                current_tokens = 0
-
-            # Try paragraph-level splitting first (secondary boundary)
-            paragraphs = _split_by_paragraphs(section)
-            if len(paragraphs) > 1:
-                # Re-accumulate paragraphs into sub-chunks
-                sub_parts: list[str] = []
-                sub_tokens = 0
-                if header_context:
-                    sub_parts.append(header_context)
-                    sub_tokens = count_tokens(header_context)
-                for para in paragraphs:
-                    para_tokens = count_tokens(para)
-                    if para_tokens > chunk_size:
-                        # Single paragraph too large — token-split it
-                        if sub_parts:
-                            chunks.append("\n\n".join(sub_parts))
-                            sub_parts = []
-                            sub_tokens = 0
-                        chunks.extend(chunk_token_based(para, chunk_size, overlap))
-                    elif sub_tokens + para_tokens > chunk_size and sub_parts:
-                        chunks.append("\n\n".join(sub_parts))
-                        sub_parts = [header_context] if header_context else []
-                        sub_tokens = count_tokens(header_context) if header_context else 0
-                        sub_parts.append(para)
-                        sub_tokens += para_tokens
-                    else:
-                        sub_parts.append(para)
-                        sub_tokens += para_tokens
-                if sub_parts:
-                    chunks.append("\n\n".join(sub_parts))
-            else:
-                # No paragraph breaks — fall back to token-based split
-                sub_chunks = chunk_token_based(section, chunk_size, overlap)
-                if header_context and sub_chunks:
-                    sub_chunks[0] = header_context + "\n\n" + sub_chunks[0]
-                chunks.extend(sub_chunks)
+    # cumulative[k] is the token total of sections[:k], so the cost of
+    # sections[i:j] is cumulative[j] - cumulative[i]
+    cumulative = [0, *accumulate(section_tokens)]
+    header_tokens: dict[str, int] = {"": 0}  # Counted once per header
+
+    chunks: list[str] = []
+    carried_header = ""  # Header propagated into the next chunk
+    i = 0
+    while i < len(sections):
+        if section_tokens[i] > chunk_size:
+            header = section_headers[i]
+            if header not in header_tokens:
+                header_tokens[header] = count_tokens(header)
+            chunks.extend(_split_oversized_section(
+                sections[i], section_ids[i], header, header_tokens[header],
+                chunk_size, overlap,
+            ))
+            carried_header = ""
+            i += 1
             continue
 
-        if current_tokens + section_tokens > chunk_size and current_parts:
-            # Would exceed limit — finalize current chunk
-            chunks.append("\n\n".join(current_parts))
-            current_parts = []
-            current_tokens = 0
-            # Propagate header context to new chunk
-            if header_context:
-                current_parts.append(header_context)
-                current_tokens = count_tokens(header_context)
+        # Furthest boundary that keeps the chunk within chunk_size. An
+        # oversized section can never fit, so the search stops before it.
+        budget = cumulative[i] + chunk_size - header_tokens[carried_header]
+        j = max(bisect_right(cumulative, budget, lo=i + 1) - 1, i + 1)
 
-        current_parts.append(section)
-        current_tokens += section_tokens
+        parts = [carried_header] if carried_header else []
+        parts.extend(sections[i:j])
+        chunks.append("\n\n".join(parts))
 
-    if current_parts:
-        chunks.append("\n\n".join(current_parts))
+        # A regular section that did not fit opens the next chunk with the
+        # header context active at that section
+        carried_header = ""
+        if j < len(sections) and section_tokens[j] <= chunk_size:
+            carried_header = section_headers[j]
+            if carried_header not in header_tokens:
+                header_tokens[carried_header] = count_tokens(carried_header)
+        i = j
+
+    return chunks
+
+
+def _split_oversized_section(
+    section: str,
+    section_ids: list[int],
+    header_context: str,
+    header_tokens: int,
+    chunk_size: int,
+    overlap: int,
+) -> list[str]:
+    """Split a section that exceeds chunk_size on its own.
+
+    Tries paragraph breaks (secondary boundary) first and falls back to
+    a token-based split, prefixing the active header context.
+    """
+    chunks: list[str] = []
+    paragraphs = _split_by_paragraphs(section)
+    if len(paragraphs) > 1:
+        # Re-accumulate paragraphs into sub-chunks
+        sub_parts: list[str] = []
+        sub_tokens = 0
+        if header_context:
+            sub_parts.append(header_context)
+            sub_tokens = header_tokens
+        for para, para_ids in zip(paragraphs, encode_batch(paragraphs)):
+            para_tokens = len(para_ids)
+            if para_tokens > chunk_size:
+                # Single paragraph too large — token-split it
+                if sub_parts:
+                    chunks.append("\n\n".join(sub_parts))
+                    sub_parts = []
+                    sub_tokens = 0
+                chunks.extend(_split_tokens(para_ids, chunk_size, overlap))
+            elif sub_tokens + para_tokens > chunk_size and sub_parts:
+                chunks.append("\n\n".join(sub_parts))
+                sub_parts = [header_context] if header_context else []
+                sub_tokens = header_tokens
+                sub_parts.append(para)
+                sub_tokens += para_tokens
+            else:
+                sub_parts.append(para)
+                sub_tokens += para_tokens
+        if sub_parts:
+            chunks.append("\n\n".join(sub_parts))
+    else:
+        # No paragraph breaks — fall back to token-based split
+        sub_chunks = _split_tokens(section_ids, chunk_size, overlap)
+        if header_context and sub_chunks:
+            sub_chunks[0] = header_context + "\n\n" + sub_chunks[0]
+        chunks.extend(sub_chunks)
 
     return chunks
 
@@ -120,13 +161,32 @@ def chunk_token_based(
     content: str,
     chunk_size: int,
     overlap: int,
+    tokens: list[int] | None = None,
 ) -> list[str]:
-    """Split content at fixed token boundaries with overlap."""
-    tokens = encode(content)
+    """Split content at fixed token boundaries with overlap.
+
+    tokens may be passed when content has already been encoded.
+    """
+    if tokens is None:
+        tokens = encode(content)
 
     if len(tokens) <= chunk_size:
         return [content]
 
+    return _split_tokens(tokens, chunk_size, overlap)
+
+
+def _split_tokens(
+    tokens: list[int],
+    chunk_size: int,
+    overlap: int,
+) -> list[str]:
+    """Decode fixed-size, overlapping windows of already-encoded tokens.
+
+    Shared by chunk_token_based and the oversized-unit fallback in
+    chunk_semantic, so content that was encoded for counting is not
+    encoded a second time for splitting.
+    """
     overlap = min(overlap, chunk_size - 1)
     chunks: list[str] = []
     start = 0
@@ -145,8 +205,37 @@ def chunk_content(
     strategy: str = "semantic",
     chunk_size: int = DEFAULT_CHUNK_SIZE_TOKENS,
     overlap: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    tokens: list[int] | None = None,
 ) -> list[str]:
-    """Chunk content using the specified strategy."""
-    if strategy == "token":
-        return chunk_token_based(content, chunk_size, overlap)
+    """Chunk content using the specified strategy.
+
+    tokens, the already-encoded content, is reused by the token strategy;
+    the semantic strategy encodes section by section.
+
+    Raises:
+        ValueError: If strategy is not one of the registered chunkers.
+    """
+    try:
+        chunker = _CHUNKERS[strategy]
+    except KeyError:
+        raise ValueError(
+            f"Unknown chunking strategy {strategy!r}; expected one of {sorted(_CHUNKERS)}"
+        ) from None
+    return chunker(content, chunk_size, overlap, tokens)
+
+
+def _semantic_chunker(
+    content: str,
+    chunk_size: int,
+    overlap: int,
+    tokens: list[int] | None,
+) -> list[str]:
+    """chunk_semantic behind the dispatch signature; tokens is not needed."""
     return chunk_semantic(content, chunk_size, overlap)
+
+
+# Strategy name -> chunker(content, chunk_size, overlap, tokens)
+_CHUNKERS: dict[str, Callable[[str, int, int, list[int] | None], list[str]]] = {
+    "semantic": _semantic_chunker,
+    "token": chunk_token_based,
+}
@@ -7,3 +7,11 @@ LLM_MODEL = os.getenv("LLM_MODEL", "openrouter:openai/gpt-4o-mini")
 DEFAULT_CHUNK_SIZE_TOKENS = int(os.getenv("DEFAULT_CHUNK_SIZE_TOKENS", "8000"))
 DEFAULT_CHUNK_OVERLAP_TOKENS = int(os.getenv("DEFAULT_CHUNK_OVERLAP_TOKENS", "500"))
 DEFAULT_MAX_OUTPUT_TOKENS = int(os.getenv("DEFAULT_MAX_OUTPUT_TOKENS", "5000"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "600"))
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "10"))
+SUMMARIZER_CACHE_DIR = os.getenv("SUMMARIZER_CACHE_DIR", ".llm-cache")
+SUMMARIZER_CACHE_DISABLED = os.getenv("SUMMARIZER_CACHE_DISABLED", "false").lower() in ("1", "true", "yes")
+SUMMARIZER_SEMANTIC_CACHE = os.getenv("SUMMARIZER_SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes")
+SUMMARIZER_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SUMMARIZER_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SUMMARIZER_SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARIZER_SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
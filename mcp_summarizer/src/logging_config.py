@@ -1,8 +1,10 @@
 """Structured JSON logging with service_id in every event."""
 
-import json
 import logging
 import sys
+import time
+
+import orjson
 
 SERVICE_ID = "mcp_summarizer"
 
@@ -18,20 +20,36 @@ _EXTRA_KEYS = (
 class JsonFormatter(logging.Formatter):
     """JSON log formatter that includes service_id in every event."""
 
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # (epoch second, formatted prefix); one tuple so threads swap it atomically
+        self._second_cache: tuple[int, str] = (-1, "")
+
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        """ISO-8601 UTC timestamp, formatting the seconds part once per second."""
+        second = int(record.created)
+        cached_second, prefix = self._second_cache
+        if cached_second != second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second_cache = (second, prefix)
+        return f"{prefix}.{int(record.msecs):03d}Z"
+
     def format(self, record: logging.LogRecord) -> str:
         log_entry = {
-            "timestamp": self.formatTime(record, self.datefmt),
+            "timestamp": self._timestamp(record),
             "level": record.levelname.lower(),
             "service_id": SERVICE_ID,
             "event": record.getMessage(),
             "logger": record.name,
         }
+        # Extras are set as instance attributes; one dict probe per key
+        attrs = record.__dict__
         for key in _EXTRA_KEYS:
-            if hasattr(record, key):
-                log_entry[key] = getattr(record, key)
+            if key in attrs:
+                log_entry[key] = attrs[key]
         if record.exc_info and record.exc_info[1]:
             log_entry["exception"] = self.formatException(record.exc_info)
-        return json.dumps(log_entry)
+        return orjson.dumps(log_entry).decode()
 
 
 def setup_logging() -> None:
@@ -0,0 +1,45 @@
+"""Adaptive concurrency limit for LLM provider calls.
+
+Additive-increase / multiplicative-decrease: a rate-limited response halves
+the number of calls allowed in flight, and after a cooldown each successful
+call raises it by one again, up to the configured maximum.
+"""
+
+import asyncio
+import time
+
+RATE_LIMIT_COOLDOWN_SECONDS = 30.0
+
+
+class AdaptiveConcurrency:
+    """Async context manager bounding in-flight calls to an adaptive limit."""
+
+    def __init__(self, max_concurrent: int, cooldown: float = RATE_LIMIT_COOLDOWN_SECONDS) -> None:
+        self._max = max_concurrent
+        self._limit = max_concurrent
+        self._in_flight = 0
+        self._cooldown = cooldown
+        self._backoff_until = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        return self._limit
+
+    def on_rate_limited(self) -> None:
+        """Halve the limit and hold off increases for the cooldown."""
+        self._limit = max(1, self._limit // 2)
+        self._backoff_until = time.monotonic() + self._cooldown
+
+    async def __aenter__(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            if exc_type is None and self._limit < self._max and time.monotonic() >= self._backoff_until:
+                self._limit += 1
+            self._condition.notify_all()
@@ -0,0 +1,96 @@
+"""Near-duplicate cache for map-phase chunk summaries.
+
+Chunks are embedded with the shared embedding provider. A new chunk whose
+cosine similarity to a cached chunk reaches the threshold reuses that
+chunk's summary instead of calling the LLM. Entries are scoped by a
+context key (prompt template and format arguments) so a summary is only
+reused for the same kind of request, and by the max tokens it was written
+under so a reused summary never exceeds the caller's budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import deque
+from operator import mul
+
+from shared.embedding import EmbeddingProvider, create_embedding_provider
+from src.config import (
+    MAX_CONCURRENT_LLM_CALLS,
+    SUMMARIZER_SEMANTIC_CACHE_MAX_ENTRIES,
+    SUMMARIZER_SEMANTIC_CACHE_THRESHOLD,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    """Scale a vector to unit length so a dot product is cosine similarity."""
+    norm = math.sqrt(math.fsum(x * x for x in vector))
+    if norm == 0.0:
+        return vector
+    return [x / norm for x in vector]
+
+
+class SemanticCache:
+    """In-memory store of (context, unit embedding, max tokens, summary) entries.
+
+    Lookups scan the entries with a dot product. The store holds at most
+    max_entries across all contexts, dropping the oldest first. At most
+    max_concurrent embedding requests are in flight at once.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        threshold: float = SUMMARIZER_SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SUMMARIZER_SEMANTIC_CACHE_MAX_ENTRIES,
+        max_concurrent: int = MAX_CONCURRENT_LLM_CALLS,
+    ) -> None:
+        self._provider = provider
+        self._threshold = threshold
+        self._entries: deque[tuple[str, list[float], int, str]] = deque(maxlen=max_entries)
+        self._embed_slots = asyncio.Semaphore(max_concurrent)
+
+    async def embed(self, text: str) -> list[float] | None:
+        """Embed text to a unit vector. Returns None if the provider fails."""
+        try:
+            async with self._embed_slots:
+                vector = await self._provider.embed(text)
+            return _normalize(vector)
+        except Exception:
+            logger.debug("semantic_cache_embedding_failed", exc_info=True)
+            return None
+
+    def lookup(self, context: str, vector: list[float], max_tokens: int) -> str | None:
+        """Return the summary of the most similar cached chunk at or above threshold.
+
+        Only summaries written under the same context with at most max_tokens
+        are considered.
+        """
+        best_score = self._threshold
+        best_summary = None
+        for cached_context, cached_vector, cached_max_tokens, summary in self._entries:
+            if cached_context != context or cached_max_tokens > max_tokens:
+                continue
+            score = sum(map(mul, vector, cached_vector))
+            if score >= best_score:
+                best_score, best_summary = score, summary
+        return best_summary
+
+    def add(self, context: str, vector: list[float], max_tokens: int, summary: str) -> None:
+        """Store a chunk's embedding and the summary written for it with max_tokens."""
+        self._entries.append((context, vector, max_tokens, summary))
+
+
+_semantic_cache: SemanticCache | None = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Lazy-init the semantic cache singleton with the configured provider."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(create_embedding_provider())
+    return _semantic_cache
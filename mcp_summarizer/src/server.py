@@ -1,25 +1,55 @@
 """MCP Summarizer Service — FastMCP server with summarization tools."""
 
+import asyncio
 import logging
+import sys
+from collections.abc import Awaitable, Callable
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from shared.prompt_loader import load_prompt
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 from src.config import DEFAULT_MAX_OUTPUT_TOKENS, MCP_SUMMARIZER_PORT
 from src.logging_config import setup_logging
 from src.summarizer import map_reduce_summarize
-from src.tokens import count_tokens
+from src.tokens import certainly_fits, encode
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 server = FastMCP(name="Summarizer Service", host="0.0.0.0", port=MCP_SUMMARIZER_PORT)
 
-# Load prompt templates once at import
-_chunk_template = load_prompt(__file__, "summarize_chunk")
-_extraction_template = load_prompt(__file__, "summarize_chunk_extraction")
-_merge_template = load_prompt(__file__, "merge_summaries")
+# Prompt templates, read from disk on first use rather than at import
+_templates: dict[str, str] = {}
+
+
+def _get_template(name: str) -> str:
+    """Load a prompt template once and cache it for later calls."""
+    if name not in _templates:
+        _templates[name] = load_prompt(__file__, name)
+    return _templates[name]
+
+
+def _partial_reporter(ctx: Context | None) -> Callable[[str], Awaitable[None]] | None:
+    """Build a callback that sends partial summaries as progress notifications.
+
+    Returns None unless the client asked for progress (sent a progress
+    token), so intermediate summaries are only joined when someone reads them.
+    """
+    if ctx is None:
+        return None
+    meta = ctx.request_context.meta
+    if meta is None or meta.progressToken is None:
+        return None
+
+    step = 0
+
+    async def report(partial: str) -> None:
+        nonlocal step
+        step += 1
+        await ctx.report_progress(step, message=partial)
+
+    return report
 
 
 @server.custom_route("/health", methods=["GET"])
@@ -34,15 +64,21 @@ async def summarize(
     max_output_tokens: int = 0,
     focus_areas: str = "",
     strategy: str = "semantic",
+    ctx: Context | None = None,
 ) -> str:
     """Summarize large text content using map-reduce chunking.
 
+    Clients that send a progress token receive the intermediate summary
+    after the map phase and after each reduce pass as the message of a
+    progress notification, before the final summary is returned.
+
     Args:
         content: The text to summarize.
         max_output_tokens: Target summary size in tokens. 0 = use service default.
         focus_areas: Comma-separated topics to emphasize (e.g., "NPCs, factions, lore").
                      Empty = general summarization.
         strategy: Chunking strategy — "semantic" (default) or "token".
+        ctx: Request context, injected by FastMCP.
 
     Returns:
         A compressed summary string.
@@ -50,17 +86,24 @@ async def summarize(
     try:
         target = max_output_tokens if max_output_tokens > 0 else DEFAULT_MAX_OUTPUT_TOKENS
 
-        # Bypass: already small enough
-        if count_tokens(content) <= target:
+        # Bypass: already small enough. Short content is settled by its
+        # byte length; otherwise the token IDs are handed on so
+        # map_reduce_summarize does not tokenize the content again.
+        if certainly_fits(content, target):
+            return content
+        content_tokens = encode(content)
+        if len(content_tokens) <= target:
             return content
 
         focus_instructions = f"\nFocus especially on: {focus_areas}\n" if focus_areas else ""
         return await map_reduce_summarize(
             content=content,
-            prompt_template=_chunk_template,
-            merge_template=_merge_template,
+            prompt_template=_get_template("summarize_chunk"),
+            merge_template=_get_template("merge_summaries"),
             max_output_tokens=target,
             strategy=strategy,
+            content_tokens=content_tokens,
+            on_partial=_partial_reporter(ctx),
             focus_instructions=focus_instructions,
         )
     except Exception:
@@ -73,15 +116,19 @@ async def summarize_for_extraction(
     content: str,
     schema_hint: str,
     max_output_tokens: int = 0,
+    ctx: Context | None = None,
 ) -> str:
     """Summarize content optimized for downstream structured extraction.
 
+    Intermediate summaries are reported as progress, as in summarize.
+
     Args:
         content: The text to summarize.
         schema_hint: Description of target extraction schema. Tells the summarizer
                      what categories of information to preserve (e.g., "zone metadata,
                      NPCs with faction allegiances, faction hierarchy, lore events").
         max_output_tokens: Target summary size in tokens. 0 = use service default.
+        ctx: Request context, injected by FastMCP.
 
     Returns:
         A summary optimized for extraction — preserves named entities, relationships,
@@ -90,16 +137,23 @@ async def summarize_for_extraction(
     try:
         target = max_output_tokens if max_output_tokens > 0 else DEFAULT_MAX_OUTPUT_TOKENS
 
-        # Bypass: already small enough
-        if count_tokens(content) <= target:
+        # Bypass: already small enough. Short content is settled by its
+        # byte length; otherwise the token IDs are handed on so
+        # map_reduce_summarize does not tokenize the content again.
+        if certainly_fits(content, target):
+            return content
+        content_tokens = encode(content)
+        if len(content_tokens) <= target:
             return content
 
         return await map_reduce_summarize(
             content=content,
-            prompt_template=_extraction_template,
-            merge_template=_merge_template,
+            prompt_template=_get_template("summarize_chunk_extraction"),
+            merge_template=_get_template("merge_summaries"),
             max_output_tokens=target,
             strategy="semantic",
+            content_tokens=content_tokens,
+            on_partial=_partial_reporter(ctx),
             schema_hint=schema_hint,
             focus_instructions=f"\nFocus especially on: {schema_hint}\n",
         )
@@ -109,4 +163,9 @@ async def summarize_for_extraction(
 
 
 if __name__ == "__main__":
+    # libuv-based loop for the LLM HTTP fan-out; uvloop has no Windows build
+    if sys.platform != "win32":
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     server.run(transport="streamable-http")
@@ -1,48 +1,331 @@
 """Map-reduce summarization engine with LLM calls."""
 
 import asyncio
+import hashlib
 import logging
+from bisect import bisect_right
+from collections.abc import Awaitable, Callable
+from itertools import accumulate
 
+import diskcache
+from aiolimiter import AsyncLimiter
 from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError
 from pydantic_ai.settings import ModelSettings
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from src.chunker import chunk_content
 from src.config import (
     DEFAULT_CHUNK_OVERLAP_TOKENS,
     DEFAULT_CHUNK_SIZE_TOKENS,
     LLM_MODEL,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    MAX_CONCURRENT_LLM_CALLS,
+    SUMMARIZER_CACHE_DIR,
+    SUMMARIZER_CACHE_DISABLED,
+    SUMMARIZER_SEMANTIC_CACHE,
 )
-from src.tokens import count_tokens
+from src.rate_limiter import AdaptiveConcurrency
+from src.semantic_cache import get_semantic_cache
+from src.tokens import count_tokens, encode, encode_batch
 
 logger = logging.getLogger(__name__)
 
-_agent = Agent(LLM_MODEL, output_type=str)
+_agent: Agent | None = None
 
 MAX_REDUCE_PASSES = 3
-MAX_CONCURRENT_LLM_CALLS = 5
-_llm_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+LLM_MAX_ATTEMPTS = 3
+_RETRY_INITIAL_DELAY = 2  # seconds, doubled per retry
+_RETRY_MAX_DELAY = 30
+SUMMARY_SEPARATOR = "\n\n---\n\n"
 
+# Calls in flight, halved while the provider is answering 429
+_llm_concurrency = AdaptiveConcurrency(MAX_CONCURRENT_LLM_CALLS)
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=30))
-async def _llm_call(prompt: str, max_tokens: int) -> str:
-    """Call the LLM with retry. Raises on persistent failure."""
-    result = await _agent.run(
-        prompt,
-        model_settings=ModelSettings(max_tokens=max_tokens, temperature=0.1),
-    )
-    return result.output
+# Token-per-minute budget: each call is charged its prompt tokens plus its
+# max output tokens, so cost tracks what the provider actually meters
+_llm_limiter = AsyncLimiter(LLM_TOKENS_PER_MINUTE, 60)
+_llm_request_limiter = AsyncLimiter(LLM_REQUESTS_PER_MINUTE, 60)
+
+# Completed LLM outputs, keyed by model, max_tokens and prompt
+_llm_cache: diskcache.Cache | None = None
+
+
+def _get_agent() -> Agent:
+    """Lazy-init the LLM agent singleton on the first LLM call."""
+    global _agent
+    if _agent is None:
+        _agent = Agent(LLM_MODEL, output_type=str)
+    return _agent
+
+
+def _get_llm_cache() -> diskcache.Cache | None:
+    """Lazy-open the on-disk LLM response cache. None when disabled."""
+    global _llm_cache
+    if _llm_cache is None and not SUMMARIZER_CACHE_DISABLED:
+        _llm_cache = diskcache.Cache(SUMMARIZER_CACHE_DIR)
+    return _llm_cache
+
+
+def _cache_key(prompt: str, max_tokens: int) -> str:
+    """Content address of an LLM call: SHA-256 of model, max_tokens and prompt."""
+    return hashlib.sha256(f"{LLM_MODEL}|{max_tokens}|{prompt}".encode()).hexdigest()
+
+
+def _cached_output(prompt: str, max_tokens: int) -> str | None:
+    """Return the disk-cached LLM output for a prompt, or None on a miss."""
+    cache = _get_llm_cache()
+    if cache is None:
+        return None
+    return cache.get(_cache_key(prompt, max_tokens))
+
+
+async def _llm_request(prompt: str, max_tokens: int, prompt_tokens: int | None = None) -> str:
+    """Call the LLM with retry. Raises the last error on persistent failure.
+
+    Failed attempts back off exponentially (2s, 4s, ... capped at 30s).
+    Each attempt waits for prompt + max_tokens credits in the per-minute
+    token budget, and for one request in the per-minute request budget,
+    before calling the provider. A 429 response also lowers the adaptive
+    concurrency limit. prompt_tokens, when the caller already knows it,
+    saves counting the prompt here.
+    """
+    if prompt_tokens is None:
+        prompt_tokens = count_tokens(prompt)
+    cost = min(prompt_tokens + max_tokens, _llm_limiter.max_rate)
+    delay = _RETRY_INITIAL_DELAY
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        await _llm_request_limiter.acquire()
+        await _llm_limiter.acquire(cost)
+        try:
+            result = await _get_agent().run(
+                prompt,
+                model_settings=ModelSettings(max_tokens=max_tokens, temperature=0.1),
+            )
+            return result.output
+        except Exception as exc:
+            if isinstance(exc, ModelHTTPError) and exc.status_code == 429:
+                _llm_concurrency.on_rate_limited()
+            if attempt == LLM_MAX_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _RETRY_MAX_DELAY)
+
+
+async def _llm_call(prompt: str, max_tokens: int, prompt_tokens: int | None = None) -> str:
+    """Return the LLM output for a prompt, from the disk cache when possible.
+
+    Only the output string is stored, so a repeated prompt returns without
+    calling the provider or drawing from the token budget. The concurrency
+    limit is held for the provider call alone, so prompt building and
+    cache hits never wait behind in-flight LLM calls.
+    """
+    output = _cached_output(prompt, max_tokens)
+    if output is not None:
+        return output
+
+    async with _llm_concurrency:
+        output = await _llm_request(prompt, max_tokens, prompt_tokens)
+    cache = _get_llm_cache()
+    if cache is not None:
+        cache[_cache_key(prompt, max_tokens)] = output
+    return output
 
 
 async def _summarize_chunk(
     chunk: str,
     prompt_template: str,
     max_tokens_per_chunk: int,
+    prompt_tokens: int | None = None,
     **format_kwargs,
 ) -> str:
-    """Summarize a single chunk using the given prompt template."""
+    """Summarize a single chunk using the given prompt template.
+
+    With SUMMARIZER_SEMANTIC_CACHE on, a near-duplicate of an earlier chunk
+    summarized the same way, within the same token budget or a tighter one,
+    reuses that chunk's summary. The chunk is only embedded when the disk
+    cache has no exact match for the prompt.
+    """
+    # str.format parses the template in C; a Python-level precompiled
+    # renderer measured slower than re-parsing these short templates
     prompt = prompt_template.format(content=chunk, **format_kwargs)
-    return await _llm_call(prompt, max_tokens_per_chunk)
+    if not SUMMARIZER_SEMANTIC_CACHE:
+        return await _llm_call(prompt, max_tokens_per_chunk, prompt_tokens)
+
+    summary = _cached_output(prompt, max_tokens_per_chunk)
+    if summary is not None:
+        return summary
+
+    semantic_cache = get_semantic_cache()
+    # Not keyed on max tokens: that varies with document length, so the
+    # same boilerplate chunk would land in a new context for every document
+    context = hashlib.sha256(f"{prompt_template}|{sorted(format_kwargs.items())}".encode()).hexdigest()
+    vector = await semantic_cache.embed(chunk)
+    if vector is not None:
+        summary = semantic_cache.lookup(context, vector, max_tokens_per_chunk)
+        if summary is not None:
+            return summary
+
+    summary = await _llm_call(prompt, max_tokens_per_chunk, prompt_tokens)
+    if vector is not None:
+        semantic_cache.add(context, vector, max_tokens_per_chunk, summary)
+    return summary
+
+
+def _joined_tokens(token_counts: list[int], separator_tokens: int) -> int:
+    """Estimate the token count of summaries joined by SUMMARY_SEPARATOR."""
+    return sum(token_counts) + separator_tokens * max(len(token_counts) - 1, 0)
+
+
+def _group_for_merge(
+    token_counts: list[int],
+    budget: int,
+    separator_tokens: int,
+) -> list[tuple[int, int]]:
+    """Group adjacent summaries into merge batches.
+
+    Each batch takes at least two summaries and grows while its joined
+    token estimate stays within budget. A trailing summary left over on
+    its own forms a single-item batch.
+
+    Returns:
+        (start, end) slice bounds into the summary list, in order.
+    """
+    # Prefix sums of each summary plus one separator: a batch's joined
+    # estimate is a difference of two prefixes minus the trailing separator,
+    # so each batch end is found by bisection instead of a running loop
+    prefix = [0, *accumulate(count + separator_tokens for count in token_counts)]
+    n = len(token_counts)
+    groups: list[tuple[int, int]] = []
+    start = 0
+    while start < n:
+        end = bisect_right(prefix, prefix[start] + budget + separator_tokens) - 1
+        end = min(max(end, start + 2), n)
+        groups.append((start, end))
+        start = end
+    return groups
+
+
+def _settled_group_end(
+    token_counts: list[int | None],
+    start: int,
+    budget: int,
+    separator_tokens: int,
+) -> int | None:
+    """End of the merge batch starting at start, once it can no longer change.
+
+    Follows the same greedy rule as _group_for_merge over summaries that may
+    still be pending (None). A batch is settled when the summary that would
+    overflow it is known, or when it reaches the end of the list.
+
+    Returns:
+        The batch's end bound, or None while it depends on a pending summary.
+    """
+    n = len(token_counts)
+    if token_counts[start] is None:
+        return None
+    total = token_counts[start]
+    end = start + 1
+    while end < n:
+        if token_counts[end] is None:
+            return None
+        next_total = total + separator_tokens + token_counts[end]
+        if end - start >= 2 and next_total > budget:
+            return end
+        total = next_total
+        end += 1
+    return end
+
+
+async def _map_with_streamed_merge(
+    map_tasks: list[asyncio.Future[str]],
+    merge: Callable[[list[str], list[int], int, bool], Awaitable[str]],
+    max_tokens_per_chunk: int,
+    max_output_tokens: int,
+    budget: int,
+    separator_tokens: int,
+    on_partial: Callable[[str], Awaitable[None]] | None = None,
+) -> tuple[list[str], list[int], int]:
+    """Collect map summaries, starting first-pass merges as batches settle.
+
+    Once the finished summaries alone exceed max_output_tokens a reduce pass
+    is certain, so each merge batch starts as soon as its summaries are in
+    rather than after the slowest chunk. Batches match what
+    _group_for_merge picks over the complete list. on_partial, when given,
+    is awaited with the joined map summaries once they are all in, if they
+    are over target, while the merges still run.
+
+    Returns:
+        The summaries and their token counts after the map phase, or after
+        the first reduce pass if one ran, and the number of batches merged
+        (0 when the map output needed no reduction).
+    """
+    n = len(map_tasks)
+    index = {task: i for i, task in enumerate(map_tasks)}
+    summaries: list[str | None] = [None] * n
+    token_counts: list[int | None] = [None] * n
+    known_tokens = -separator_tokens
+    reducing = False
+    groups: list[tuple[int, int]] = []
+    merges: list[asyncio.Future[str]] = []
+    pending = set(map_tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finished = [(index[task], task.result()) for task in done]
+            outputs = [output for _, output in finished]
+            for (i, output), ids in zip(finished, encode_batch(outputs)):
+                summaries[i] = output
+                token_counts[i] = len(ids)
+                known_tokens += len(ids) + separator_tokens
+
+            reducing = reducing or known_tokens > max_output_tokens
+            if not reducing:
+                continue
+
+            start = groups[-1][1] if groups else 0
+            while start < n:
+                end = _settled_group_end(token_counts, start, budget, separator_tokens)
+                if end is None:
+                    break
+                only_group = start == 0 and end == n
+                if only_group:
+                    target = max_output_tokens
+                else:
+                    # Pending summaries are assumed to use their full allowance
+                    estimate = [c if c is not None else max_tokens_per_chunk for c in token_counts]
+                    planned = len(_group_for_merge(estimate, budget, separator_tokens))
+                    target = max(max_output_tokens // max(planned, 2), 500)
+                groups.append((start, end))
+                merges.append(asyncio.ensure_future(
+                    merge(summaries[start:end], token_counts[start:end], target, only_group)
+                ))
+                start = end
+
+        if not reducing:
+            return summaries, token_counts, 0
+
+        if on_partial is not None:
+            await on_partial(SUMMARY_SEPARATOR.join(summaries))
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "reduce_pass",
+                extra={
+                    "pass": 1,
+                    "combined_tokens": known_tokens,
+                    "num_chunks": len(groups),
+                    "target": max_output_tokens,
+                    "model": LLM_MODEL,
+                },
+            )
+        merged = await asyncio.gather(*merges)
+    except BaseException:
+        for task in (*map_tasks, *merges):
+            task.cancel()
+        raise
+
+    return merged, [len(ids) for ids in encode_batch(merged)], len(groups)
 
 
 async def map_reduce_summarize(
@@ -53,83 +336,173 @@ async def map_reduce_summarize(
     strategy: str = "semantic",
     chunk_size: int = DEFAULT_CHUNK_SIZE_TOKENS,
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    content_tokens: list[int] | None = None,
+    on_partial: Callable[[str], Awaitable[None]] | None = None,
     **format_kwargs,
 ) -> str:
     """Full map-reduce summarization pipeline.
 
     1. Chunk content into manageable segments.
     2. Map: summarize each chunk independently (concurrent).
-    3. Reduce: if combined summaries exceed target, merge and repeat.
+    3. Reduce: while combined summaries exceed target, merge adjacent
+       summaries in groups (concurrent) and repeat. The first pass
+       overlaps the map phase, merging groups as their summaries finish.
+
+    content_tokens may carry the caller's encoding of content so it is not
+    tokenized a second time. on_partial, when given, is awaited with the
+    joined summaries after the map phase and after each reduce pass that
+    leaves them over target, so callers can surface intermediate results
+    before the pipeline finishes.
     """
-    input_tokens = count_tokens(content)
+    if content_tokens is None:
+        content_tokens = encode(content)
+    input_tokens = len(content_tokens)
 
     # Bypass: already small enough
     if input_tokens <= max_output_tokens:
         return content
 
     # --- Map Phase ---
-    chunks = chunk_content(content, strategy, chunk_size, chunk_overlap)
+    chunks = chunk_content(content, strategy, chunk_size, chunk_overlap, tokens=content_tokens)
     max_tokens_per_chunk = max(max_output_tokens // len(chunks), 500)
 
-    logger.info(
-        "map_phase_started",
-        extra={
-            "input_tokens": input_tokens,
-            "num_chunks": len(chunks),
-            "strategy": strategy,
-            "max_tokens_per_chunk": max_tokens_per_chunk,
-            "model": LLM_MODEL,
-        },
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "map_phase_started",
+            extra={
+                "input_tokens": input_tokens,
+                "num_chunks": len(chunks),
+                "strategy": strategy,
+                "max_tokens_per_chunk": max_tokens_per_chunk,
+                "model": LLM_MODEL,
+            },
+        )
 
-    # Concurrent chunk summarization (bounded by semaphore)
-    async def _bounded_summarize(chunk: str) -> str:
-        async with _llm_semaphore:
-            return await _summarize_chunk(
-                chunk, prompt_template, max_tokens_per_chunk, **format_kwargs
-            )
+    # Prompt sizes for the token budget: the chunks are counted in one
+    # batched encode rather than once per LLM call, plus the template's
+    # own tokens. BPE merges across the seams make this an estimate.
+    template_tokens = count_tokens(prompt_template.format(content="", **format_kwargs))
+    chunk_tokens = [len(ids) for ids in encode_batch(chunks)]
 
-    tasks = [_bounded_summarize(chunk) for chunk in chunks]
-    summaries = await asyncio.gather(*tasks)
+    # Tree reduction: adjacent summaries are merged in groups that fit one
+    # LLM input, concurrently, until the total is within the target.
+    separator_tokens = count_tokens(SUMMARY_SEPARATOR)
 
-    # --- Reduce Phase ---
-    combined = "\n\n---\n\n".join(summaries)
-    combined_tokens = count_tokens(combined)
+    async def _merge_group(
+        group: list[str],
+        group_tokens: list[int],
+        target: int,
+        merge_single: bool,
+    ) -> str:
+        # A leftover single summary is carried to the next pass as-is
+        if len(group) == 1 and not merge_single:
+            return group[0]
+        merge_prompt = merge_template.format(
+            content=SUMMARY_SEPARATOR.join(group),
+            max_tokens=target,
+            **format_kwargs,
+        )
+        # The summaries' counts are already known, so only the template is new
+        template_tokens = count_tokens(
+            merge_template.format(content="", max_tokens=target, **format_kwargs)
+        )
+        prompt_tokens = template_tokens + _joined_tokens(group_tokens, separator_tokens)
+        return await _llm_call(merge_prompt, target, prompt_tokens)
+
+    # Concurrent chunk summarization (provider calls bounded in _llm_call),
+    # with the first reduce pass started as soon as its groups are known
+    map_tasks = [
+        asyncio.ensure_future(_summarize_chunk(
+            chunk, prompt_template, max_tokens_per_chunk, template_tokens + tokens, **format_kwargs
+        ))
+        for chunk, tokens in zip(chunks, chunk_tokens)
+    ]
+    summaries, summary_tokens, streamed_groups = await _map_with_streamed_merge(
+        map_tasks,
+        _merge_group,
+        max_tokens_per_chunk,
+        max_output_tokens,
+        chunk_size,
+        separator_tokens,
+        on_partial,
+    )
+    combined_tokens = _joined_tokens(summary_tokens, separator_tokens)
+    if on_partial is not None and combined_tokens > max_output_tokens:
+        await on_partial(SUMMARY_SEPARATOR.join(summaries))
 
-    for pass_num in range(MAX_REDUCE_PASSES):
+    # Fingerprints of the summary lists seen so far. A pass that reproduces
+    # an earlier list (e.g. cached merges) cannot make progress, so the
+    # loop stops instead of spending its remaining passes. str caches its
+    # hash, so re-checking the same summaries costs O(1) per summary.
+    seen_summaries = {hash(tuple(summaries))}
+
+    # --- Reduce Phase (remaining passes) ---
+    for pass_num in range(1 if streamed_groups else 0, MAX_REDUCE_PASSES):
         if combined_tokens <= max_output_tokens:
             break
 
+        groups = _group_for_merge(summary_tokens, chunk_size, separator_tokens)
+        if len(groups) == 1:
+            merge_target = max_output_tokens
+        else:
+            merge_target = max(max_output_tokens // len(groups), 500)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "reduce_pass",
+                extra={
+                    "pass": pass_num + 1,
+                    "combined_tokens": combined_tokens,
+                    "num_chunks": len(groups),
+                    "target": max_output_tokens,
+                    "model": LLM_MODEL,
+                },
+            )
+
+        summaries = await asyncio.gather(*(
+            _merge_group(
+                summaries[start:end], summary_tokens[start:end], merge_target, len(groups) == 1
+            )
+            for start, end in groups
+        ))
+        fingerprint = hash(tuple(summaries))
+        if fingerprint in seen_summaries:
+            logger.warning(
+                "reduce_stalled",
+                extra={
+                    "pass": pass_num + 1,
+                    "combined_tokens": combined_tokens,
+                    "target": max_output_tokens,
+                    "model": LLM_MODEL,
+                },
+            )
+            break
+        seen_summaries.add(fingerprint)
+        summary_tokens = [len(ids) for ids in encode_batch(summaries)]
+        combined_tokens = _joined_tokens(summary_tokens, separator_tokens)
+        if on_partial is not None and combined_tokens > max_output_tokens:
+            await on_partial(SUMMARY_SEPARATOR.join(summaries))
+
+    # Passes measure summaries individually, so apart from partials sent
+    # to on_partial this is the only full join; str.join sizes the result
+    # up front so it is a single allocation
+    combined = SUMMARY_SEPARATOR.join(summaries)
+
+    # combined_tokens already measures the final summaries, so the output
+    # is not tokenized again just for the log
+    if logger.isEnabledFor(logging.INFO):
+        output_tokens = combined_tokens
+        ratio = input_tokens / max(output_tokens, 1)
         logger.info(
-            "reduce_pass",
+            "summarization_complete",
             extra={
-                "pass": pass_num + 1,
-                "combined_tokens": combined_tokens,
-                "target": max_output_tokens,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "compression_ratio": round(ratio, 1),
+                "num_chunks": len(chunks),
+                "strategy": strategy,
                 "model": LLM_MODEL,
             },
         )
 
-        merge_prompt = merge_template.format(
-            content=combined,
-            max_tokens=max_output_tokens,
-            **format_kwargs,
-        )
-        combined = await _llm_call(merge_prompt, max_output_tokens)
-        combined_tokens = count_tokens(combined)
-
-    output_tokens = count_tokens(combined)
-    ratio = input_tokens / max(output_tokens, 1)
-    logger.info(
-        "summarization_complete",
-        extra={
-            "input_tokens": input_tokens,
-            "output_tokens": output_tokens,
-            "compression_ratio": round(ratio, 1),
-            "num_chunks": len(chunks),
-            "strategy": strategy,
-            "model": LLM_MODEL,
-        },
-    )
-
     return combined
@@ -1,20 +1,67 @@
 """Token counting and encoding via tiktoken (cl100k_base)."""
 
+import os
+
 import tiktoken
 
-_encoding = tiktoken.get_encoding("cl100k_base")
+_encoding: tiktoken.Encoding | None = None
+
+# tiktoken starts a thread pool per batch call; below this many texts the
+# pool costs more than the parallel encoding saves
+_BATCH_MIN_TEXTS = 32
+_BATCH_THREADS = min(8, os.cpu_count() or 1)
+
+
+def _get_encoding() -> tiktoken.Encoding:
+    """Lazy-load the cl100k_base encoding on first use.
+
+    Loading the BPE ranks takes a noticeable fraction of a second, so it is
+    kept off the import path and out of server startup.
+    """
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
 
 
 def count_tokens(text: str) -> int:
     """Count tokens using cl100k_base encoding."""
-    return len(_encoding.encode(text))
+    return len(_get_encoding().encode_ordinary(text))
+
+
+def certainly_fits(text: str, max_tokens: int) -> bool:
+    """Check, without tokenizing, whether text is within max_tokens.
+
+    Every token covers at least one UTF-8 byte, so a text whose byte length
+    is within the limit cannot exceed it. False means "unknown", not "over".
+    """
+    # Byte length is at least the character length, so skip the encode
+    # for texts that are already too long by characters
+    return len(text) <= max_tokens and len(text.encode("utf-8")) <= max_tokens
 
 
 def encode(text: str) -> list[int]:
-    """Encode text to token IDs."""
-    return _encoding.encode(text)
+    """Encode text to token IDs.
+
+    Content is encoded as ordinary text: special-token markers such as
+    <|endoftext|> in crawled pages are tokenized like any other characters
+    instead of raising, and the special-token scan is skipped.
+    """
+    return _get_encoding().encode_ordinary(text)
+
+
+def encode_batch(texts: list[str]) -> list[list[int]]:
+    """Encode several texts to token IDs.
+
+    tiktoken releases the GIL while encoding, so large batches are spread
+    across threads; small batches (or single-core hosts) encode inline.
+    """
+    encoding = _get_encoding()
+    if len(texts) < _BATCH_MIN_TEXTS or _BATCH_THREADS == 1:
+        return [encoding.encode_ordinary(text) for text in texts]
+    return encoding.encode_ordinary_batch(texts, num_threads=_BATCH_THREADS)
 
 
 def decode(tokens: list[int]) -> str:
     """Decode token IDs to text."""
-    return _encoding.decode(tokens)
+    return _get_encoding().decode(tokens)
@@ -1,12 +1,16 @@
 """Unit tests for src/chunker.py — chunking engine."""
 
+from unittest.mock import patch
+
+import pytest
+
 from src.chunker import (
     _split_by_paragraphs,
     chunk_content,
     chunk_semantic,
     chunk_token_based,
 )
-from src.tokens import count_tokens
+from src.tokens import count_tokens, encode, encode_batch
 
 
 # --- _split_by_paragraphs ---
@@ -193,6 +197,17 @@ def test_semantic_oversized_section_falls_to_token_based():
     assert "Dense Section" in result[0]
 
 
+def test_semantic_oversized_section_encoded_once():
+    # Token fallback reuses the IDs from counting instead of re-encoding
+    long_text = "word " * 500
+    with patch("src.chunker.encode", wraps=encode) as mock_encode, \
+         patch("src.chunker.encode_batch", wraps=encode_batch) as mock_batch:
+        result = chunk_semantic(long_text, chunk_size=50, overlap=5)
+    assert len(result) > 1
+    mock_encode.assert_not_called()
+    mock_batch.assert_called_once_with([long_text.strip()])
+
+
 def test_semantic_horizontal_rule_boundary():
     content = "Section above the rule.\n\n---\n\nSection below the rule."
     # Small chunk_size to force split
@@ -266,8 +281,7 @@ def test_chunk_content_uses_config_defaults():
     assert result == ["Short content."]
 
 
-def test_chunk_content_unknown_strategy_falls_to_semantic():
-    # Unknown strategy should fall through to semantic (default branch)
+def test_chunk_content_unknown_strategy_raises():
     content = "# Test\n\nContent."
-    result = chunk_content(content, strategy="unknown")
-    assert len(result) >= 1
+    with pytest.raises(ValueError, match="unknown"):
+        chunk_content(content, strategy="unknown")
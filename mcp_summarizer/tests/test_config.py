@@ -65,3 +65,40 @@ def test_custom_max_output_tokens(monkeypatch):
     import src.config as cfg
     importlib.reload(cfg)
     assert cfg.DEFAULT_MAX_OUTPUT_TOKENS == 10000
+
+
+def test_default_llm_tokens_per_minute(monkeypatch):
+    monkeypatch.delenv("LLM_TOKENS_PER_MINUTE", raising=False)
+    import src.config as cfg
+    importlib.reload(cfg)
+    assert cfg.LLM_TOKENS_PER_MINUTE == 1000000
+
+
+def test_default_max_concurrent_llm_calls(monkeypatch):
+    monkeypatch.delenv("MAX_CONCURRENT_LLM_CALLS", raising=False)
+    import src.config as cfg
+    importlib.reload(cfg)
+    assert cfg.MAX_CONCURRENT_LLM_CALLS == 10
+
+
+def test_default_cache_settings(monkeypatch):
+    monkeypatch.delenv("SUMMARIZER_CACHE_DIR", raising=False)
+    monkeypatch.delenv("SUMMARIZER_CACHE_DISABLED", raising=False)
+    import src.config as cfg
+    importlib.reload(cfg)
+    assert cfg.SUMMARIZER_CACHE_DIR == ".llm-cache"
+    assert cfg.SUMMARIZER_CACHE_DISABLED is False
+
+
+def test_cache_disabled_flag(monkeypatch):
+    monkeypatch.setenv("SUMMARIZER_CACHE_DISABLED", "true")
+    import src.config as cfg
+    importlib.reload(cfg)
+    assert cfg.SUMMARIZER_CACHE_DISABLED is True
+
+
+def test_default_requests_per_minute(monkeypatch):
+    monkeypatch.delenv("LLM_REQUESTS_PER_MINUTE", raising=False)
+    import src.config as cfg
+    importlib.reload(cfg)
+    assert cfg.LLM_REQUESTS_PER_MINUTE == 600
@@ -2,6 +2,7 @@
 
 import json
 import logging
+from unittest.mock import patch
 
 from src.logging_config import JsonFormatter, SERVICE_ID, setup_logging
 
@@ -25,6 +26,35 @@ def test_json_formatter_produces_valid_json():
     assert "timestamp" in parsed
 
 
+def test_json_formatter_timestamp_is_utc_iso():
+    formatter = JsonFormatter()
+    record = logging.LogRecord(
+        name="test", level=logging.INFO, pathname="", lineno=0,
+        msg="event", args=(), exc_info=None,
+    )
+    record.created = 1700000000.25
+    record.msecs = 250.0
+    parsed = json.loads(formatter.format(record))
+    assert parsed["timestamp"] == "2023-11-14T22:13:20.250Z"
+
+
+def test_json_formatter_reuses_timestamp_within_second():
+    formatter = JsonFormatter()
+    record = logging.LogRecord(
+        name="test", level=logging.INFO, pathname="", lineno=0,
+        msg="event", args=(), exc_info=None,
+    )
+    record.created = 1700000000.1
+    record.msecs = 100.0
+    formatter.format(record)
+    with patch("src.logging_config.time.strftime") as mock_strftime:
+        record.created = 1700000000.9
+        record.msecs = 900.0
+        parsed = json.loads(formatter.format(record))
+    mock_strftime.assert_not_called()
+    assert parsed["timestamp"] == "2023-11-14T22:13:20.900Z"
+
+
 def test_json_formatter_includes_extras():
     formatter = JsonFormatter()
     record = logging.LogRecord(
@@ -0,0 +1,70 @@
+"""Unit tests for src/rate_limiter.py — AIMD concurrency limit."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.rate_limiter import AdaptiveConcurrency
+
+
+@pytest.mark.asyncio
+async def test_bounds_in_flight_calls():
+    limit = AdaptiveConcurrency(2)
+    in_flight = 0
+    peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with limit:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+
+
+def test_rate_limited_halves_limit():
+    limit = AdaptiveConcurrency(10)
+    limit.on_rate_limited()
+    assert limit.limit == 5
+    limit.on_rate_limited()
+    limit.on_rate_limited()
+    limit.on_rate_limited()
+    assert limit.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_no_increase_during_cooldown():
+    limit = AdaptiveConcurrency(4, cooldown=30.0)
+    limit.on_rate_limited()
+    async with limit:
+        pass
+    assert limit.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_success_after_cooldown_adds_one():
+    limit = AdaptiveConcurrency(4, cooldown=30.0)
+    with patch("src.rate_limiter.time.monotonic", return_value=100.0):
+        limit.on_rate_limited()
+    with patch("src.rate_limiter.time.monotonic", return_value=131.0):
+        async with limit:
+            pass
+        async with limit:
+            pass
+        async with limit:
+            pass
+    assert limit.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_failure_does_not_increase():
+    limit = AdaptiveConcurrency(4, cooldown=0.0)
+    limit.on_rate_limited()
+    with pytest.raises(RuntimeError):
+        async with limit:
+            raise RuntimeError("provider error")
+    assert limit.limit == 2
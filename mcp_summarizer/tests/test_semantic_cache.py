@@ -0,0 +1,95 @@
+"""Unit tests for src/semantic_cache.py — near-duplicate chunk summary reuse."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.semantic_cache import SemanticCache
+
+
+def _cache(vectors: dict[str, list[float]], **kwargs) -> SemanticCache:
+    provider = AsyncMock()
+    provider.embed.side_effect = lambda text: vectors[text]
+    return SemanticCache(provider, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_embed_returns_unit_vector():
+    cache = _cache({"chunk": [3.0, 4.0]})
+    assert await cache.embed("chunk") == pytest.approx([0.6, 0.8])
+
+
+@pytest.mark.asyncio
+async def test_embed_failure_returns_none():
+    provider = AsyncMock()
+    provider.embed.side_effect = RuntimeError("provider down")
+    assert await SemanticCache(provider).embed("chunk") is None
+
+
+@pytest.mark.asyncio
+async def test_embed_bounded_by_max_concurrent():
+    in_flight = peak = 0
+
+    async def embed(text):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [1.0, 0.0]
+
+    provider = AsyncMock()
+    provider.embed.side_effect = embed
+    cache = SemanticCache(provider, max_concurrent=2)
+    await asyncio.gather(*(cache.embed(f"chunk {i}") for i in range(6)))
+    assert peak == 2
+
+
+def test_lookup_hits_above_threshold():
+    cache = _cache({}, threshold=0.95)
+    cache.add("ctx", [1.0, 0.0], 500, "Summary A.")
+    assert cache.lookup("ctx", [0.99, 0.141], 500) == "Summary A."
+
+
+def test_lookup_misses_below_threshold():
+    cache = _cache({}, threshold=0.95)
+    cache.add("ctx", [1.0, 0.0], 500, "Summary A.")
+    assert cache.lookup("ctx", [0.6, 0.8], 500) is None
+
+
+def test_lookup_returns_most_similar():
+    cache = _cache({}, threshold=0.9)
+    cache.add("ctx", [0.95, 0.312], 500, "Close.")
+    cache.add("ctx", [1.0, 0.0], 500, "Closest.")
+    assert cache.lookup("ctx", [1.0, 0.0], 500) == "Closest."
+
+
+def test_lookup_scoped_by_context():
+    cache = _cache({})
+    cache.add("general", [1.0, 0.0], 500, "General summary.")
+    assert cache.lookup("extraction", [1.0, 0.0], 500) is None
+
+
+def test_lookup_skips_summaries_over_budget():
+    cache = _cache({})
+    cache.add("ctx", [1.0, 0.0], 800, "Long summary.")
+    assert cache.lookup("ctx", [1.0, 0.0], 500) is None
+    assert cache.lookup("ctx", [1.0, 0.0], 1000) == "Long summary."
+
+
+def test_oldest_entries_evicted():
+    cache = _cache({}, max_entries=1)
+    cache.add("ctx", [1.0, 0.0], 500, "Old.")
+    cache.add("ctx", [0.0, 1.0], 500, "New.")
+    assert cache.lookup("ctx", [1.0, 0.0], 500) is None
+    assert cache.lookup("ctx", [0.0, 1.0], 500) == "New."
+
+
+def test_entry_limit_spans_contexts():
+    cache = _cache({}, max_entries=2)
+    for context in ("a", "b", "c"):
+        cache.add(context, [1.0, 0.0], 500, f"Summary {context}.")
+    assert cache.lookup("a", [1.0, 0.0], 500) is None
+    assert cache.lookup("b", [1.0, 0.0], 500) == "Summary b."
+    assert cache.lookup("c", [1.0, 0.0], 500) == "Summary c."
@@ -1,10 +1,12 @@
 """Unit tests for src/server.py — MCP tool endpoints."""
 
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from starlette.testclient import TestClient
 
+from src.tokens import encode
+
 
 # --- health check endpoint ---
 
@@ -41,6 +43,18 @@ async def test_summarize_bypass_default_target():
     assert result == "Short text."
 
 
+@pytest.mark.asyncio
+async def test_summarize_bypass_skips_tokenizing_short_content():
+    """Content whose byte length is within target is returned without encoding."""
+    from src.server import summarize
+
+    with patch("src.server.encode") as mock_encode:
+        result = await summarize(content="Short text.", max_output_tokens=100)
+
+    assert result == "Short text."
+    mock_encode.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_summarize_calls_map_reduce():
     """Large content should trigger map_reduce_summarize."""
@@ -61,6 +75,7 @@ async def test_summarize_calls_map_reduce():
     assert call_kwargs["max_output_tokens"] == 100
     assert call_kwargs["strategy"] == "token"
     assert "NPCs, factions" in call_kwargs["focus_instructions"]
+    assert call_kwargs["content_tokens"] == encode(large_content)
 
 
 @pytest.mark.asyncio
@@ -93,7 +108,7 @@ async def test_summarize_graceful_degradation():
 @pytest.mark.asyncio
 async def test_summarize_uses_correct_template():
     """summarize should use the chunk template (not extraction)."""
-    from src.server import _chunk_template, summarize
+    from src.server import _get_template, summarize
 
     large_content = "word " * 10000
     with patch("src.server.map_reduce_summarize", new_callable=AsyncMock) as mock_mr:
@@ -101,7 +116,7 @@ async def test_summarize_uses_correct_template():
         await summarize(content=large_content, max_output_tokens=100)
 
     call_kwargs = mock_mr.call_args[1]
-    assert call_kwargs["prompt_template"] == _chunk_template
+    assert call_kwargs["prompt_template"] == _get_template("summarize_chunk")
 
 
 # --- summarize_for_extraction tool ---
@@ -123,7 +138,7 @@ async def test_extraction_bypass_small_content():
 @pytest.mark.asyncio
 async def test_extraction_calls_map_reduce():
     """Large content should trigger map_reduce_summarize with extraction template."""
-    from src.server import _extraction_template, summarize_for_extraction
+    from src.server import _get_template, summarize_for_extraction
 
     large_content = "word " * 10000
     with patch("src.server.map_reduce_summarize", new_callable=AsyncMock) as mock_mr:
@@ -136,7 +151,7 @@ async def test_extraction_calls_map_reduce():
 
     assert result == "Extraction summary."
     call_kwargs = mock_mr.call_args[1]
-    assert call_kwargs["prompt_template"] == _extraction_template
+    assert call_kwargs["prompt_template"] == _get_template("summarize_chunk_extraction")
     assert call_kwargs["max_output_tokens"] == 200
     assert call_kwargs["strategy"] == "semantic"
     assert call_kwargs["schema_hint"] == "zone metadata, NPCs, factions"
@@ -196,13 +211,70 @@ async def test_extraction_default_max_output_tokens():
     assert call_kwargs["max_output_tokens"] == DEFAULT_MAX_OUTPUT_TOKENS
 
 
+# --- Partial summaries as progress ---
+
+
+@pytest.mark.asyncio
+async def test_partials_reported_as_progress():
+    """With a progress token, each partial summary becomes a progress message."""
+    from src.server import summarize
+
+    ctx = MagicMock()
+    ctx.request_context.meta.progressToken = "token-1"
+    ctx.report_progress = AsyncMock()
+
+    async def fake_map_reduce(**kwargs):
+        await kwargs["on_partial"]("First pass.")
+        await kwargs["on_partial"]("Second pass.")
+        return "Final."
+
+    with patch("src.server.map_reduce_summarize", side_effect=fake_map_reduce):
+        result = await summarize(content="word " * 10000, max_output_tokens=100, ctx=ctx)
+
+    assert result == "Final."
+    assert [c.args[0] for c in ctx.report_progress.call_args_list] == [1, 2]
+    assert [c.kwargs["message"] for c in ctx.report_progress.call_args_list] == [
+        "First pass.",
+        "Second pass.",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_no_partials_without_progress_token():
+    """Without a progress token no partial-summary callback is passed on."""
+    from src.server import summarize_for_extraction
+
+    ctx = MagicMock()
+    ctx.request_context.meta.progressToken = None
+
+    with patch("src.server.map_reduce_summarize", new_callable=AsyncMock) as mock_mr:
+        mock_mr.return_value = "Summary."
+        await summarize_for_extraction(
+            content="word " * 10000, schema_hint="data", max_output_tokens=100, ctx=ctx,
+        )
+
+    assert mock_mr.call_args[1]["on_partial"] is None
+
+
 # --- Template loading ---
 
 
 def test_templates_loaded():
-    """Prompt templates should be loaded at import time."""
-    from src.server import _chunk_template, _extraction_template, _merge_template
+    """Prompt templates should load from the prompts/ directory."""
+    from src.server import _get_template
+
+    assert "Summarize the following content" in _get_template("summarize_chunk")
+    assert "structured data extraction" in _get_template("summarize_chunk_extraction")
+    assert "Merge them into a single coherent summary" in _get_template("merge_summaries")
+
+
+def test_templates_read_once():
+    """A template is read from disk on first use and cached afterwards."""
+    from src.server import _get_template, _templates
 
-    assert "Summarize the following content" in _chunk_template
-    assert "structured data extraction" in _extraction_template
-    assert "Merge them into a single coherent summary" in _merge_template
+    _templates.clear()
+    with patch("src.server.load_prompt", return_value="template") as mock_load:
+        assert _get_template("summarize_chunk") == "template"
+        assert _get_template("summarize_chunk") == "template"
+    _templates.clear()
+    mock_load.assert_called_once()
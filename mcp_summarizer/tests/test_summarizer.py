@@ -4,16 +4,21 @@ import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from tenacity import RetryError
+from aiolimiter import AsyncLimiter
 
 from src.summarizer import (
     MAX_CONCURRENT_LLM_CALLS,
+    LLM_MAX_ATTEMPTS,
     MAX_REDUCE_PASSES,
+    SUMMARY_SEPARATOR,
+    _group_for_merge,
     _llm_call,
     _summarize_chunk,
     map_reduce_summarize,
 )
-from src.tokens import count_tokens
+from src.chunker import chunk_content
+from src.rate_limiter import AdaptiveConcurrency
+from src.tokens import count_tokens, encode
 
 
 # --- Helpers ---
@@ -26,9 +31,58 @@ def _make_mock_result(output: str):
     return result
 
 
+@pytest.fixture(autouse=True)
+def fresh_llm_limiter():
+    """Give each test (and its event loop) its own rate limiters."""
+    with patch("src.summarizer._llm_limiter", AsyncLimiter(1000000, 60)), \
+         patch("src.summarizer._llm_request_limiter", AsyncLimiter(1000000, 60)), \
+         patch("src.summarizer._llm_concurrency", AdaptiveConcurrency(MAX_CONCURRENT_LLM_CALLS)):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_cache():
+    """Give each test an empty in-memory LLM response cache."""
+    with patch("src.summarizer._llm_cache", {}):
+        yield
+
+
 # --- _llm_call ---
 
 
+@pytest.mark.asyncio
+async def test_llm_call_charges_prompt_and_output_tokens():
+    limiter = AsyncLimiter(1000000, 60)
+    with patch("src.summarizer._agent") as mock_agent, \
+         patch("src.summarizer._llm_limiter", limiter), \
+         patch.object(limiter, "acquire", new_callable=AsyncMock) as mock_acquire:
+        mock_agent.run = AsyncMock(return_value=_make_mock_result("OK"))
+        await _llm_call("Summarize this.", max_tokens=500)
+    mock_acquire.assert_awaited_once_with(count_tokens("Summarize this.") + 500)
+
+
+@pytest.mark.asyncio
+async def test_llm_call_uses_known_prompt_tokens():
+    limiter = AsyncLimiter(1000000, 60)
+    with patch("src.summarizer._agent") as mock_agent, \
+         patch("src.summarizer._llm_limiter", limiter), \
+         patch.object(limiter, "acquire", new_callable=AsyncMock) as mock_acquire, \
+         patch("src.summarizer.count_tokens") as mock_count:
+        mock_agent.run = AsyncMock(return_value=_make_mock_result("OK"))
+        await _llm_call("Summarize this.", max_tokens=500, prompt_tokens=7)
+    mock_acquire.assert_awaited_once_with(507)
+    mock_count.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_llm_call_cost_capped_at_budget():
+    limiter = AsyncLimiter(100, 60)
+    with patch("src.summarizer._agent") as mock_agent, \
+         patch("src.summarizer._llm_limiter", limiter):
+        mock_agent.run = AsyncMock(return_value=_make_mock_result("OK"))
+        assert await _llm_call("Summarize this.", max_tokens=500) == "OK"
+
+
 @pytest.mark.asyncio
 async def test_llm_call_returns_content():
     mock_result = _make_mock_result("Summary text.")
@@ -58,7 +112,7 @@ async def test_llm_call_retries_on_failure():
         mock_agent.run = AsyncMock(
             side_effect=[Exception("API error"), Exception("API error"), mock_result]
         )
-        with patch("src.summarizer._llm_call.retry.wait", return_value=0):
+        with patch("src.summarizer._RETRY_INITIAL_DELAY", 0):
             result = await _llm_call("Summarize this.", max_tokens=500)
     assert result == "Got it."
     assert mock_agent.run.call_count == 3
@@ -70,15 +124,82 @@ async def test_llm_call_raises_after_max_retries():
         mock_agent.run = AsyncMock(
             side_effect=Exception("Persistent failure")
         )
-        with patch("src.summarizer._llm_call.retry.wait", return_value=0):
-            with pytest.raises(RetryError):
+        with patch("src.summarizer._RETRY_INITIAL_DELAY", 0):
+            with pytest.raises(Exception, match="Persistent failure"):
                 await _llm_call("Summarize this.", max_tokens=500)
-    assert mock_agent.run.call_count == 3
+    assert mock_agent.run.call_count == LLM_MAX_ATTEMPTS
 
 
 # --- _summarize_chunk ---
 
 
+@pytest.mark.asyncio
+async def test_rate_limited_response_halves_concurrency():
+    from pydantic_ai.exceptions import ModelHTTPError
+
+    concurrency = AdaptiveConcurrency(8)
+    mock_agent = AsyncMock()
+    mock_agent.run.side_effect = [ModelHTTPError(429, "test-model"), _make_mock_result("OK")]
+    with patch("src.summarizer._agent", mock_agent), \
+            patch("src.summarizer._llm_concurrency", concurrency), \
+            patch("src.summarizer._RETRY_INITIAL_DELAY", 0):
+        assert await _llm_call("Summarize this.", max_tokens=500) == "OK"
+    assert concurrency.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_llm_call_backs_off_exponentially():
+    with patch("src.summarizer._agent") as mock_agent, \
+         patch("src.summarizer.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        mock_agent.run = AsyncMock(side_effect=Exception("API error"))
+        with pytest.raises(Exception, match="API error"):
+            await _llm_call("Summarize this.", max_tokens=500)
+    assert [c.args[0] for c in mock_sleep.await_args_list] == [2, 4]
+
+
+@pytest.mark.asyncio
+async def test_agent_created_on_first_llm_call():
+    with patch("src.summarizer._agent", None), patch("src.summarizer.Agent") as mock_agent_cls:
+        mock_agent_cls.return_value.run = AsyncMock(return_value=_make_mock_result("ok"))
+        assert await _llm_call("prompt", 100) == "ok"
+        await _llm_call("again", 100)
+    mock_agent_cls.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_llm_call_cached_on_repeat():
+    mock_agent = AsyncMock()
+    mock_agent.run.return_value = _make_mock_result("Cached.")
+    with patch("src.summarizer._agent", mock_agent):
+        assert await _llm_call("Summarize this.", max_tokens=500) == "Cached."
+        assert await _llm_call("Summarize this.", max_tokens=500) == "Cached."
+        await _llm_call("Summarize this.", max_tokens=200)
+    assert mock_agent.run.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_llm_call_failure_not_cached():
+    mock_agent = AsyncMock()
+    mock_agent.run.side_effect = [Exception("down")] * LLM_MAX_ATTEMPTS + [_make_mock_result("OK")]
+    with patch("src.summarizer._agent", mock_agent), \
+            patch("src.summarizer._RETRY_INITIAL_DELAY", 0):
+        with pytest.raises(Exception, match="down"):
+            await _llm_call("Summarize this.", max_tokens=500)
+        assert await _llm_call("Summarize this.", max_tokens=500) == "OK"
+
+
+@pytest.mark.asyncio
+async def test_llm_call_cache_disabled():
+    mock_agent = AsyncMock()
+    mock_agent.run.return_value = _make_mock_result("OK")
+    with patch("src.summarizer._agent", mock_agent), \
+            patch("src.summarizer._llm_cache", None), \
+            patch("src.summarizer.SUMMARIZER_CACHE_DISABLED", True):
+        await _llm_call("Summarize this.", max_tokens=500)
+        await _llm_call("Summarize this.", max_tokens=500)
+    assert mock_agent.run.call_count == 2
+
+
 @pytest.mark.asyncio
 async def test_summarize_chunk_formats_prompt():
     template = "Summarize: {content}\nFocus: {focus_instructions}"
@@ -97,6 +218,66 @@ async def test_summarize_chunk_formats_prompt():
     assert "NPCs and factions" in prompt
 
 
+@pytest.mark.asyncio
+async def test_summarize_chunk_reuses_near_duplicate_summary():
+    from src.semantic_cache import SemanticCache
+
+    provider = AsyncMock()
+    provider.embed.side_effect = lambda text: [1.0, 0.0] if "Home" in text else [0.0, 1.0]
+    template = "Summarize: {content}{focus_instructions}"
+    with patch("src.summarizer.SUMMARIZER_SEMANTIC_CACHE", True), \
+            patch("src.summarizer.get_semantic_cache", return_value=SemanticCache(provider)), \
+            patch("src.summarizer._llm_call", new_callable=AsyncMock) as mock_llm:
+        mock_llm.side_effect = ["Nav summary.", "Lore summary.", "NPC summary."]
+        first = await _summarize_chunk("Home | Zones", template, 500, focus_instructions="")
+        repeat = await _summarize_chunk("Home | Zones ", template, 500, focus_instructions="")
+        other = await _summarize_chunk("Elwynn lore.", template, 500, focus_instructions="")
+        refocused = await _summarize_chunk("Home | Zones", template, 500, focus_instructions="NPCs")
+
+    assert (first, repeat, other) == ("Nav summary.", "Nav summary.", "Lore summary.")
+    # Same chunk with different format arguments is a different context
+    assert refocused == "NPC summary."
+    assert mock_llm.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_summarize_chunk_reuse_ignores_larger_budget():
+    from src.semantic_cache import SemanticCache
+
+    provider = AsyncMock()
+    provider.embed.return_value = [1.0, 0.0]
+    template = "Summarize: {content}"
+    with patch("src.summarizer.SUMMARIZER_SEMANTIC_CACHE", True), \
+            patch("src.summarizer.get_semantic_cache", return_value=SemanticCache(provider)), \
+            patch("src.summarizer._llm_call", new_callable=AsyncMock) as mock_llm:
+        mock_llm.side_effect = ["Short summary.", "Tight summary."]
+        first = await _summarize_chunk("Home | Zones", template, 500)
+        looser = await _summarize_chunk("Home | Zones", template, 800)
+        tighter = await _summarize_chunk("Home | Zones", template, 300)
+
+    # Per-chunk budgets vary with document length; a summary written under
+    # a tighter budget still fits a looser one
+    assert (first, looser, tighter) == ("Short summary.", "Short summary.", "Tight summary.")
+    assert mock_llm.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_summarize_chunk_exact_hit_skips_embedding():
+    from src.semantic_cache import SemanticCache
+
+    provider = AsyncMock()
+    provider.embed.return_value = [1.0, 0.0]
+    mock_agent = AsyncMock()
+    mock_agent.run.return_value = _make_mock_result("Cached.")
+    with patch("src.summarizer.SUMMARIZER_SEMANTIC_CACHE", True), \
+            patch("src.summarizer.get_semantic_cache", return_value=SemanticCache(provider)), \
+            patch("src.summarizer._agent", mock_agent):
+        await _llm_call("Summarize: text", 500)
+        assert await _summarize_chunk("text", "Summarize: {content}", 500) == "Cached."
+    provider.embed.assert_not_called()
+    assert mock_agent.run.call_count == 1
+
+
 @pytest.mark.asyncio
 async def test_summarize_chunk_passes_max_tokens():
     template = "{content}"
@@ -148,6 +329,32 @@ async def test_map_phase_chunks_and_summarizes():
     assert "chunk summary" in result
 
 
+@pytest.mark.asyncio
+async def test_pretokenized_content_is_not_encoded_again():
+    """Token IDs from the caller are reused for counting and token chunking."""
+    large_content = "word " * 500
+    content_tokens = encode(large_content)
+
+    with patch("src.summarizer._llm_call", new_callable=AsyncMock) as mock_llm, \
+         patch("src.summarizer.encode") as mock_encode, \
+         patch("src.chunker.encode") as mock_chunk_encode:
+        mock_llm.return_value = "chunk summary"
+        await map_reduce_summarize(
+            content=large_content,
+            prompt_template="{content}",
+            merge_template="{content}",
+            max_output_tokens=100,
+            strategy="token",
+            chunk_size=100,
+            chunk_overlap=0,
+            content_tokens=content_tokens,
+        )
+
+    mock_encode.assert_not_called()
+    mock_chunk_encode.assert_not_called()
+    assert mock_llm.call_count == -(-len(content_tokens) // 100)
+
+
 @pytest.mark.asyncio
 async def test_reduce_phase_merges_when_over_target():
     """When map summaries combined exceed target, reduce should merge them."""
@@ -157,7 +364,7 @@ async def test_reduce_phase_merges_when_over_target():
 
     call_count = 0
 
-    async def mock_llm_fn(prompt, max_tokens):
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
         nonlocal call_count
         call_count += 1
         # Map phase: return summaries that are too large combined
@@ -178,11 +385,58 @@ async def test_reduce_phase_merges_when_over_target():
             focus_instructions="",
         )
 
-    assert result == "Final merged summary."
+    # Every map summary was folded into a merge
+    assert "chunk summary" not in result
+    assert set(result.split(SUMMARY_SEPARATOR)) == {"Final merged summary."}
     # Should have map calls + at least one reduce call
     assert call_count >= 3
 
 
+@pytest.mark.asyncio
+async def test_reduce_merges_groups_concurrently():
+    """Each reduce pass merges bounded groups of summaries, not everything at once."""
+    large_content = "word " * 500
+    merge_template = "Merge: {content}"
+    merge_inputs = []
+
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
+        if prompt.startswith("Merge:"):
+            merge_inputs.append(prompt)
+            return "merged"
+        return "A chunk summary that is long enough to need merging. " * 4
+
+    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn):
+        result = await map_reduce_summarize(
+            content=large_content,
+            prompt_template="{content}",
+            merge_template=merge_template,
+            max_output_tokens=50,
+            strategy="token",
+            chunk_size=100,
+            chunk_overlap=0,
+        )
+
+    # 6 map summaries pair up under the 100-token merge budget
+    assert len(merge_inputs) == 3
+    assert all(p.count(SUMMARY_SEPARATOR) == 1 for p in merge_inputs)
+    assert result.split(SUMMARY_SEPARATOR) == ["merged"] * 3
+
+
+def test_group_for_merge_respects_budget():
+    assert _group_for_merge([40, 40, 40, 40, 40], budget=100, separator_tokens=5) == [
+        (0, 2), (2, 4), (4, 5),
+    ]
+
+
+def test_group_for_merge_takes_at_least_two():
+    # Oversized summaries still pair up so every merge reduces the count
+    assert _group_for_merge([300, 300, 300], budget=100, separator_tokens=5) == [(0, 2), (2, 3)]
+
+
+def test_group_for_merge_packs_small_summaries():
+    assert _group_for_merge([10] * 6, budget=100, separator_tokens=5) == [(0, 6)]
+
+
 @pytest.mark.asyncio
 async def test_reduce_phase_max_passes():
     """Reduce phase should not exceed MAX_REDUCE_PASSES even if still over target."""
@@ -192,7 +446,7 @@ async def test_reduce_phase_max_passes():
 
     reduce_calls = 0
 
-    async def mock_llm_fn(prompt, max_tokens):
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
         nonlocal reduce_calls
         if "Merge:" in prompt:
             reduce_calls += 1
@@ -216,8 +470,82 @@ async def test_reduce_phase_max_passes():
 
 
 @pytest.mark.asyncio
-async def test_semaphore_limits_concurrency():
-    """Concurrent LLM calls should be bounded by the semaphore."""
+async def test_partial_summaries_reported_until_within_target():
+    """on_partial sees each pass whose summaries are still over target."""
+    prompt_template = "{content}{focus_instructions}"
+    merge_template = "Merge: {content} max_tokens={max_tokens}{focus_instructions}"
+    first_merge = "Merged but still too long for the target."
+    merges = iter([first_merge, "Merged."])
+    partials = []
+
+    async def on_partial(partial):
+        partials.append(partial)
+
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
+        if "Merge:" in prompt:
+            return next(merges)
+        return "Chunk summary content."
+
+    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn):
+        result = await map_reduce_summarize(
+            content="word " * 300,
+            prompt_template=prompt_template,
+            merge_template=merge_template,
+            max_output_tokens=5,
+            strategy="token",
+            chunk_size=200,
+            chunk_overlap=0,
+            on_partial=on_partial,
+            focus_instructions="",
+        )
+
+    # The map output and the first merge are over target; the second merge
+    # is within it, so it is only returned, not reported
+    map_output = SUMMARY_SEPARATOR.join(["Chunk summary content."] * 2)
+    assert partials == [map_output, first_merge]
+    assert result == "Merged."
+
+
+@pytest.mark.asyncio
+async def test_reduce_stops_when_pass_repeats_summaries(caplog):
+    """A pass that reproduces the previous summaries ends the reduce loop."""
+    prompt_template = "{content}{focus_instructions}"
+    merge_template = "Merge: {content} max_tokens={max_tokens}{focus_instructions}"
+    stuck = "Still too large. " * 10
+
+    reduce_calls = 0
+
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
+        nonlocal reduce_calls
+        if "Merge:" in prompt:
+            reduce_calls += 1
+        return stuck
+
+    import logging
+    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn), \
+            patch("src.summarizer.MAX_REDUCE_PASSES", 10), \
+            caplog.at_level(logging.WARNING, logger="src.summarizer"):
+        result = await map_reduce_summarize(
+            content="word " * 300,
+            prompt_template=prompt_template,
+            merge_template=merge_template,
+            max_output_tokens=10,
+            strategy="token",
+            chunk_size=200,
+            chunk_overlap=0,
+            focus_instructions="",
+        )
+
+    # One merge folds the two chunk summaries into [stuck]; the next
+    # merge returns [stuck] again and the loop stops there
+    assert result == stuck
+    assert reduce_calls == 2
+    assert any(r.message == "reduce_stalled" for r in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_bounds_llm_calls():
+    """Concurrent LLM calls should be bounded by the concurrency limit."""
     large_content = "word " * 2000  # Enough for many chunks
     prompt_template = "{content}{focus_instructions}"
     merge_template = "{content}{focus_instructions}"
@@ -226,7 +554,7 @@ async def test_semaphore_limits_concurrency():
     current_concurrent = 0
     lock = asyncio.Lock()
 
-    async def mock_llm_fn(prompt, max_tokens):
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
         nonlocal peak_concurrent, current_concurrent
         async with lock:
             current_concurrent += 1
@@ -237,7 +565,7 @@ async def test_semaphore_limits_concurrency():
             current_concurrent -= 1
         return "summary"
 
-    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn):
+    with patch("src.summarizer._llm_request", side_effect=mock_llm_fn):
         await map_reduce_summarize(
             content=large_content,
             prompt_template=prompt_template,
@@ -252,6 +580,19 @@ async def test_semaphore_limits_concurrency():
     assert peak_concurrent <= MAX_CONCURRENT_LLM_CALLS
 
 
+@pytest.mark.asyncio
+async def test_cache_hit_does_not_wait_for_concurrency_limit():
+    """A cached prompt returns while every LLM slot is taken."""
+    mock_agent = AsyncMock()
+    mock_agent.run.return_value = _make_mock_result("Cached.")
+    with patch("src.summarizer._agent", mock_agent), \
+            patch("src.summarizer._llm_concurrency", AdaptiveConcurrency(1)) as concurrency:
+        await _llm_call("Summarize this.", max_tokens=500)
+        async with concurrency:
+            result = await asyncio.wait_for(_llm_call("Summarize this.", max_tokens=500), 1)
+    assert result == "Cached."
+
+
 @pytest.mark.asyncio
 async def test_failure_propagates():
     """If LLM persistently fails, the error should propagate up."""
@@ -326,3 +667,178 @@ async def test_compression_ratio_logged(caplog):
     assert len(complete_records) == 1
     assert hasattr(complete_records[0], "compression_ratio")
     assert complete_records[0].compression_ratio > 0
+
+
+@pytest.mark.asyncio
+async def test_output_not_retokenized_for_completion_log(caplog):
+    """The completion log reuses the reduce-phase count of the final output."""
+    large_content = "word " * 500
+
+    with patch("src.summarizer._llm_call", new_callable=AsyncMock) as mock_llm, \
+         patch("src.summarizer.count_tokens", wraps=count_tokens) as mock_count:
+        mock_llm.return_value = "brief"
+        import logging
+        with caplog.at_level(logging.INFO, logger="src.summarizer"):
+            result = await map_reduce_summarize(
+                content=large_content,
+                prompt_template="{content}",
+                merge_template="{content}",
+                max_output_tokens=100,
+                strategy="token",
+                chunk_size=100,
+                chunk_overlap=0,
+            )
+
+    # Only the separator and empty templates are counted; content and
+    # summaries go through encode_batch
+    assert all("word" not in c.args[0] and "brief" not in c.args[0]
+               for c in mock_count.call_args_list)
+    complete = next(r for r in caplog.records if r.message == "summarization_complete")
+    assert complete.output_tokens == count_tokens(result)
+
+
+@pytest.mark.asyncio
+async def test_info_logs_skipped_when_disabled(caplog):
+    """With INFO disabled, no log extras are built or emitted."""
+    large_content = "word " * 500
+
+    with patch("src.summarizer._llm_call", new_callable=AsyncMock) as mock_llm, \
+         patch("src.summarizer.logger.info") as mock_info:
+        mock_llm.return_value = "brief"
+        import logging
+        with caplog.at_level(logging.WARNING, logger="src.summarizer"):
+            await map_reduce_summarize(
+                content=large_content,
+                prompt_template="{content}",
+                merge_template="{content}",
+                max_output_tokens=100,
+                strategy="token",
+                chunk_size=100,
+                chunk_overlap=0,
+            )
+
+    mock_info.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_prompt_tokens_estimated_from_batched_counts():
+    """Map and merge calls carry a prompt size close to the real count."""
+    calls = []
+
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
+        calls.append((prompt, prompt_tokens))
+        return "A short summary of part of the text. " * 5
+
+    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn):
+        await map_reduce_summarize(
+            content="word " * 2000,
+            prompt_template="Summarize:\n{content}\n{focus_instructions}",
+            merge_template="Merge into {max_tokens} tokens:\n{content}",
+            max_output_tokens=60,
+            strategy="token",
+            chunk_size=100,
+            chunk_overlap=0,
+            focus_instructions="",
+        )
+
+    assert len(calls) > 20
+    for prompt, prompt_tokens in calls:
+        assert abs(prompt_tokens - count_tokens(prompt)) <= 2
+
+
+@pytest.mark.asyncio
+async def test_first_merge_starts_before_slowest_chunk():
+    """Merge groups whose summaries are done start while a chunk is still running."""
+    slow_chunk_done = asyncio.Event()
+    merge_started_early = False
+
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
+        nonlocal merge_started_early
+        if prompt.startswith("MERGE"):
+            if not slow_chunk_done.is_set():
+                merge_started_early = True
+            return "merged"
+        if "SLOW" in prompt:
+            await asyncio.sleep(0.05)
+            slow_chunk_done.set()
+        return "x " * 300
+
+    content = "word " * 1000 + "SLOW " * 100
+    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn):
+        await map_reduce_summarize(
+            content=content,
+            prompt_template="{content}",
+            merge_template="MERGE {content}",
+            max_output_tokens=50,
+            strategy="token",
+            chunk_size=100,
+            chunk_overlap=0,
+        )
+
+    assert merge_started_early
+
+
+@pytest.mark.asyncio
+async def test_streamed_groups_match_full_grouping():
+    """Groups merged during the map phase are those the full list would give."""
+    map_outputs = {}
+    first_pass_merges = []
+
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
+        if prompt.startswith("MERGE"):
+            if "merged" not in prompt:
+                first_pass_merges.append(prompt.count(SUMMARY_SEPARATOR) + 1)
+            return "merged"
+        n = len(map_outputs)
+        map_outputs[prompt] = "x " * (20 + 13 * (n % 5))
+        await asyncio.sleep(0.001 * (n % 7))
+        return map_outputs[prompt]
+
+    content = "".join(f"part{i} " + "word " * 98 for i in range(20))
+    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn):
+        await map_reduce_summarize(
+            content=content,
+            prompt_template="{content}",
+            merge_template="MERGE {content}",
+            max_output_tokens=50,
+            strategy="token",
+            chunk_size=100,
+            chunk_overlap=0,
+        )
+
+    chunks = chunk_content(content, "token", 100, 0)
+    summary_tokens = [count_tokens(map_outputs[chunk]) for chunk in chunks]
+    expected = _group_for_merge(summary_tokens, 100, count_tokens(SUMMARY_SEPARATOR))
+    assert sorted(first_pass_merges) == sorted(end - start for start, end in expected if end - start > 1)
+
+
+@pytest.mark.asyncio
+async def test_map_failure_cancels_other_calls():
+    cancelled = 0
+
+    async def mock_llm_fn(prompt, max_tokens, prompt_tokens=None):
+        nonlocal cancelled
+        if "FAIL" in prompt:
+            raise RuntimeError("provider down")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        return "summary"
+
+    with patch("src.summarizer._llm_call", side_effect=mock_llm_fn):
+        with pytest.raises(RuntimeError, match="provider down"):
+            await map_reduce_summarize(
+                content="FAIL " * 100 + "word " * 400,
+                prompt_template="{content}",
+                merge_template="{content}",
+                max_output_tokens=50,
+                strategy="token",
+                chunk_size=100,
+                chunk_overlap=0,
+            )
+        await asyncio.sleep(0)
+
+    chunks = chunk_content("FAIL " * 100 + "word " * 400, "token", 100, 0)
+    assert cancelled == sum("FAIL" not in chunk for chunk in chunks)
@@ -1,6 +1,11 @@
 """Unit tests for src/tokens.py — tiktoken cl100k_base wrappers."""
 
-from src.tokens import count_tokens, decode, encode
+import importlib
+from unittest.mock import patch
+
+import src.tokens
+
+from src.tokens import certainly_fits, count_tokens, decode, encode, encode_batch
 
 
 def test_count_tokens_empty():
@@ -49,6 +54,40 @@ def test_encode_decode_unicode():
     assert decode(tokens) == text
 
 
+def test_special_token_text_encoded_as_ordinary():
+    text = "Page footer <|endoftext|> trailing text"
+    tokens = encode(text)
+    assert decode(tokens) == text
+    assert count_tokens(text) == len(tokens)
+    assert encode_batch([text]) == [tokens]
+
+
 def test_count_matches_encode_length():
     text = "This is a test of the token counting system."
     assert count_tokens(text) == len(encode(text))
+
+
+def test_certainly_fits_is_a_safe_bound():
+    for text in ["Hello world", "日本語のテキスト", "🙂" * 5, "word " * 50]:
+        limit = len(text.encode("utf-8"))
+        assert certainly_fits(text, limit)
+        assert count_tokens(text) <= limit
+        assert not certainly_fits(text, limit - 1)
+
+
+def test_encode_batch_matches_encode():
+    texts = ["hello world", "", "The quick brown fox."]
+    assert encode_batch(texts) == [encode(t) for t in texts]
+
+
+def test_encode_batch_threaded_matches_encode():
+    texts = [f"section {i} of the lore" for i in range(40)]
+    with patch("src.tokens._BATCH_THREADS", 4):
+        assert encode_batch(texts) == [encode(t) for t in texts]
+
+
+def test_encoding_loaded_lazily():
+    importlib.reload(src.tokens)
+    assert src.tokens._encoding is None
+    assert src.tokens.count_tokens("hello") == 1
+    assert src.tokens._encoding is not None
@@ -1,9 +1,19 @@
 """Web Search MCP Service — DuckDuckGo search integration for Mythline."""
 
 import asyncio
+import atexit
+import hashlib
 import logging
 import os
+import queue
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+import diskcache
+from aiolimiter import AsyncLimiter
 from ddgs import DDGS
 from mcp.server.fastmcp import FastMCP
 
@@ -12,14 +22,160 @@ logger = logging.getLogger(__name__)
 MCP_WEB_SEARCH_PORT = int(os.getenv("MCP_WEB_SEARCH_PORT", "8006"))
 SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "10"))
 SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "duckduckgo")
+SEARCH_CLIENT_POOL_SIZE = int(os.getenv("SEARCH_CLIENT_POOL_SIZE", "4"))
+SEARCH_REQUESTS_PER_MINUTE = int(os.getenv("SEARCH_REQUESTS_PER_MINUTE", "60"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "60"))  # seconds; 0 disables
+SEARCH_CACHE_MAX = int(os.getenv("SEARCH_CACHE_MAX", "1024"))
+
+# Recorded searches on disk. enabled: read and record; read_only: read
+# only; replay: read only, and a search with no recording is an error;
+# write_only: always search, then record; disabled: no disk cache.
+SEARCH_CACHE_MODE = os.getenv("SEARCH_CACHE_MODE", "disabled")
+SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", ".search-cache")
+
+_SEARCH_CACHE_MODES = ("enabled", "read_only", "replay", "write_only", "disabled")
+if SEARCH_CACHE_MODE not in _SEARCH_CACHE_MODES:
+    raise ValueError(
+        f"SEARCH_CACHE_MODE must be one of {', '.join(_SEARCH_CACHE_MODES)}, got {SEARCH_CACHE_MODE!r}"
+    )
 
 server = FastMCP(name="Web Search Service", host="0.0.0.0", port=MCP_WEB_SEARCH_PORT)
 
+# DDGS clients keep their engines' HTTP sessions, so reusing them keeps
+# connections alive between searches. Each search thread checks one out.
+_ddgs_pool: queue.Queue[DDGS] = queue.Queue()
+for _ in range(SEARCH_CLIENT_POOL_SIZE):
+    _ddgs_pool.put(DDGS())
+
+
+# Searches run on their own workers, one per pooled client, instead of the
+# shared default executor. Callers wait on the semaphore for a free worker
+# rather than piling up in the executor's unbounded queue.
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_CLIENT_POOL_SIZE, thread_name_prefix="ddgs")
+_search_slots = asyncio.Semaphore(SEARCH_CLIENT_POOL_SIZE)
+atexit.register(_search_executor.shutdown, wait=False)
+
+# DuckDuckGo throttles bursts, so outbound searches are paced per process.
+# Cache hits and shared in-flight searches do not spend from the bucket.
+_search_limiter = AsyncLimiter(SEARCH_REQUESTS_PER_MINUTE, 60)
+
+
+@contextmanager
+def _pooled_ddgs() -> Iterator[DDGS]:
+    """Borrow a DDGS client from the pool, waiting if all are in use."""
+    client = _ddgs_pool.get()
+    try:
+        yield client
+    finally:
+        _ddgs_pool.put(client)
+
+
+# Recent results by (kind, query, max_results, timelimit), least recently
+# used first, with their expiry time. Only touched from the event loop.
+_search_cache: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+
+# Searches currently running, so identical concurrent queries share one call
+_in_flight: dict[tuple, asyncio.Task[list[dict]]] = {}
+
+# Recorded results by search key, per SEARCH_CACHE_MODE
+_recorded_searches: diskcache.Cache | None = None
+
+
+def _get_recorded_searches() -> diskcache.Cache | None:
+    """Lazy-open the on-disk search recordings. None when SEARCH_CACHE_MODE is disabled."""
+    global _recorded_searches
+    if _recorded_searches is None and SEARCH_CACHE_MODE != "disabled":
+        _recorded_searches = diskcache.Cache(SEARCH_CACHE_DIR)
+    return _recorded_searches
+
+
+def _recording_key(key: tuple) -> str:
+    """Content address of a search: SHA-256 of its kind and parameters."""
+    return hashlib.sha256("|".join(map(str, key)).encode()).hexdigest()
+
+
+async def _run_search(key: tuple, search_fn: Callable[..., list[dict]], *args) -> list[dict]:
+    """Serve a recorded search, or run it on the search executor.
+
+    Live searches wait for the rate limit and a free worker. Non-empty
+    results are recorded when SEARCH_CACHE_MODE allows it.
+
+    Raises:
+        LookupError: In replay mode, when the search was never recorded.
+    """
+    recordings = _get_recorded_searches()
+    recording_key = _recording_key(key)
+    if recordings is not None and SEARCH_CACHE_MODE in ("enabled", "read_only", "replay"):
+        recorded = recordings.get(recording_key)
+        if recorded is not None:
+            return recorded
+        if SEARCH_CACHE_MODE == "replay":
+            raise LookupError(f"No recorded search for {key!r} in replay mode")
+
+    # Waiting for the rate limit does not hold a worker slot
+    await _search_limiter.acquire()
+    async with _search_slots:
+        results = await asyncio.get_running_loop().run_in_executor(_search_executor, search_fn, *args)
+
+    if recordings is not None and results and SEARCH_CACHE_MODE in ("enabled", "write_only"):
+        recordings.set(recording_key, results)
+    return results
+
+
+def _store_result(key: tuple, task: asyncio.Task[list[dict]]) -> None:
+    """Cache a finished search, evicting the least recently used entries.
+
+    Empty results are not cached: the sync searches return [] on failure,
+    and a failed search should be retried on the next call.
+    """
+    _in_flight.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    results = task.result()
+    if not results:
+        return
+    _search_cache[key] = (time.monotonic() + SEARCH_CACHE_TTL, results)
+    _search_cache.move_to_end(key)
+    while len(_search_cache) > SEARCH_CACHE_MAX:
+        _search_cache.popitem(last=False)
+
+
+async def _cached_search(key: tuple, search_fn: Callable[..., list[dict]], *args) -> list[dict]:
+    """Run a search, reusing recent, in-flight or recorded results.
+
+    Args:
+        key: Cache key identifying the search and its parameters.
+        search_fn: The sync search to run on a miss.
+        *args: Arguments for search_fn.
+
+    Returns:
+        The search results.
+    """
+    if SEARCH_CACHE_TTL <= 0:
+        return await _run_search(key, search_fn, *args)
+
+    cached = _search_cache.get(key)
+    if cached is not None:
+        expires_at, results = cached
+        if expires_at > time.monotonic():
+            _search_cache.move_to_end(key)
+            return results
+        del _search_cache[key]
+
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run_search(key, search_fn, *args))
+        task.add_done_callback(lambda done: _store_result(key, done))
+        _in_flight[key] = task
+    # Shielded so one cancelled caller does not cancel the shared search
+    return await asyncio.shield(task)
+
 
 def _search_sync(query: str, max_results: int) -> list[dict]:
     """Run DuckDuckGo text search synchronously."""
     try:
-        results = DDGS().text(query, max_results=max_results, backend=SEARCH_BACKEND)
+        with _pooled_ddgs() as ddgs:
+            results = ddgs.text(query, max_results=max_results, backend=SEARCH_BACKEND)
     except Exception as exc:
         logger.warning("DuckDuckGo text search failed for %r: %s", query, exc)
         return []
@@ -36,7 +192,8 @@ def _search_sync(query: str, max_results: int) -> list[dict]:
 def _search_news_sync(query: str, max_results: int, timelimit: str) -> list[dict]:
     """Run DuckDuckGo news search synchronously."""
     try:
-        results = DDGS().news(query, max_results=max_results, timelimit=timelimit, backend=SEARCH_BACKEND)
+        with _pooled_ddgs() as ddgs:
+            results = ddgs.news(query, max_results=max_results, timelimit=timelimit, backend=SEARCH_BACKEND)
     except Exception as exc:
         logger.warning("DuckDuckGo news search failed for %r: %s", query, exc)
         return []
@@ -64,11 +221,38 @@ async def search(query: str, max_results: int = 0) -> list[dict]:
     Returns:
         A list of search results, each with 'title', 'url', and 'snippet' fields.
     """
-    if not query.strip():
+    if not query or query.isspace():
         raise ValueError("Query must not be empty")
 
     limit = max_results if max_results > 0 else SEARCH_MAX_RESULTS
-    return await asyncio.to_thread(_search_sync, query, limit)
+    return await _cached_search(("text", query, limit, None), _search_sync, query, limit)
+
+
+@server.tool()
+async def search_many(queries: list[str], max_results: int = 0) -> list[list[dict]]:
+    """Run several web searches concurrently.
+
+    Args:
+        queries: The search query strings.
+        max_results: Maximum number of results per query. Defaults to
+                     SEARCH_MAX_RESULTS env var (default 10).
+
+    Returns:
+        One result list per query, in query order, each shaped like search().
+        A query whose search fails yields an empty list.
+    """
+    if not queries:
+        raise ValueError("Queries must not be empty")
+    if any(not query or query.isspace() for query in queries):
+        raise ValueError("Query must not be empty")
+
+    limit = max_results if max_results > 0 else SEARCH_MAX_RESULTS
+
+    # Searches beyond the worker count wait for a free worker
+    return list(await asyncio.gather(*(
+        _cached_search(("text", query, limit, None), _search_sync, query, limit)
+        for query in queries
+    )))
 
 
 @server.tool()
@@ -83,11 +267,13 @@ async def search_news(query: str, max_results: int = 0, timelimit: str = "w") ->
     Returns:
         A list of news results with 'title', 'url', 'snippet', 'date', and 'source'.
     """
-    if not query.strip():
+    if not query or query.isspace():
         raise ValueError("Query must not be empty")
 
     limit = max_results if max_results > 0 else SEARCH_MAX_RESULTS
-    return await asyncio.to_thread(_search_news_sync, query, limit, timelimit)
+    return await _cached_search(
+        ("news", query, limit, timelimit), _search_news_sync, query, limit, timelimit
+    )
 
 
 if __name__ == "__main__":
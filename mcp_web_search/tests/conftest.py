@@ -0,0 +1,52 @@
+"""Shared fixtures for the Web Search MCP tests.
+
+The suite runs in SEARCH_CACHE_MODE=replay against the recordings in
+tests/recordings, so CI never reaches DuckDuckGo. To refresh them, run
+once with network access and SEARCH_CACHE_MODE=enabled, then commit the
+directory. Tests marked live are skipped when they would need a search
+that cannot be served: no recordings in replay mode, or no network
+otherwise.
+"""
+
+import os
+import socket
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+RECORDINGS_DIR = Path(__file__).parent / "recordings"
+
+# Set before src.server is imported, since it reads both at import time
+os.environ.setdefault("SEARCH_CACHE_MODE", "replay")
+os.environ.setdefault("SEARCH_CACHE_DIR", str(RECORDINGS_DIR))
+
+
+def _live_search_unavailable() -> str | None:
+    """Return why live searches cannot be served, or None if they can."""
+    if os.environ["SEARCH_CACHE_MODE"] == "replay":
+        if not any(Path(os.environ["SEARCH_CACHE_DIR"]).glob("*.db")):
+            return "no search recordings; record with SEARCH_CACHE_MODE=enabled"
+        return None
+    try:
+        socket.getaddrinfo("duckduckgo.com", 443)
+    except OSError:
+        return "no network access for live DuckDuckGo searches"
+    return None
+
+
+def pytest_collection_modifyitems(config, items):
+    reason = _live_search_unavailable()
+    if reason is None:
+        return
+    for item in items:
+        if item.get_closest_marker("live"):
+            item.add_marker(pytest.mark.skip(reason=reason))
+
+
+@pytest.fixture
+def no_recordings():
+    """Bypass the on-disk recordings for tests that stub the search call."""
+    with patch("src.server.SEARCH_CACHE_MODE", "disabled"), \
+            patch("src.server._recorded_searches", None):
+        yield
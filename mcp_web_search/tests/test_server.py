@@ -1,21 +1,39 @@
 """Tests for the Web Search MCP server.
 
-Uses real DuckDuckGo API calls to verify integration works end-to-end.
-These tests require internet access.
+Tests marked live exercise real DuckDuckGo searches end-to-end. By default
+they replay the recordings in tests/recordings (see conftest.py).
 """
 
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import diskcache
 import pytest
+from aiolimiter import AsyncLimiter
+
+from src.server import search, search_many, search_news, server
+
 
-from src.server import search, search_news, server
+@pytest.fixture(autouse=True)
+def fresh_search_limiter():
+    """Give each test a full rate-limit bucket."""
+    from src.server import SEARCH_REQUESTS_PER_MINUTE
+
+    with patch("src.server._search_limiter", AsyncLimiter(SEARCH_REQUESTS_PER_MINUTE, 60)):
+        yield
 
 
 class TestSearch:
+    @pytest.mark.live
     async def test_returns_results(self):
         """Basic search should return a non-empty list of results."""
         results = await search("World of Warcraft Elwynn Forest")
         assert isinstance(results, list)
         assert len(results) > 0
 
+    @pytest.mark.live
     async def test_result_structure(self):
         """Each result should have title, url, and snippet fields."""
         results = await search("Python programming language", max_results=3)
@@ -27,6 +45,7 @@ class TestSearch:
             assert isinstance(result["url"], str)
             assert result["url"].startswith("http")
 
+    @pytest.mark.live
     async def test_max_results_limit(self):
         """Should respect max_results parameter."""
         results = await search("World of Warcraft", max_results=3)
@@ -43,6 +62,7 @@ class TestSearch:
             await search("   ")
 
 
+@pytest.mark.live
 class TestSearchNews:
     async def test_returns_news_results(self):
         """News search should return results."""
@@ -61,6 +81,210 @@ class TestSearchNews:
             assert "source" in result
 
 
+class TestSearchMany:
+    @pytest.mark.live
+    async def test_returns_results_per_query(self):
+        """Each query gets its own result list, in query order."""
+        results = await search_many(["World of Warcraft", "Elwynn Forest"], max_results=2)
+        assert len(results) == 2
+        for query_results in results:
+            assert isinstance(query_results, list)
+            assert len(query_results) <= 2
+
+    async def test_empty_queries_raises_error(self):
+        with pytest.raises(ValueError, match="must not be empty"):
+            await search_many([])
+
+    async def test_blank_query_raises_error(self):
+        with pytest.raises(ValueError, match="must not be empty"):
+            await search_many(["World of Warcraft", "  "])
+
+
+@pytest.mark.live
+class TestClientPool:
+    async def test_client_returned_after_search(self):
+        """Each search borrows a pooled client and puts it back."""
+        from src.server import SEARCH_CLIENT_POOL_SIZE, _ddgs_pool
+
+        await search("World of Warcraft", max_results=1)
+        assert _ddgs_pool.qsize() == SEARCH_CLIENT_POOL_SIZE
+
+
+@pytest.mark.usefixtures("no_recordings")
+class TestSearchWorkers:
+    async def test_searches_bounded_to_dedicated_workers(self):
+        """Searches run on the ddgs workers, at most one per pooled client."""
+        from src.server import SEARCH_CLIENT_POOL_SIZE
+
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+        thread_names = set()
+
+        def slow_search(query, max_results):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                thread_names.add(threading.current_thread().name)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return []
+
+        queries = [f"query {i}" for i in range(SEARCH_CLIENT_POOL_SIZE * 3)]
+        with patch("src.server._search_sync", side_effect=slow_search):
+            await search_many(queries)
+
+        assert peak <= SEARCH_CLIENT_POOL_SIZE
+        assert all(name.startswith("ddgs") for name in thread_names)
+
+
+@pytest.mark.usefixtures("no_recordings")
+class TestSearchCache:
+    """Cache behaviour, with the DuckDuckGo call replaced by a stub."""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        from src.server import _in_flight, _search_cache
+
+        _search_cache.clear()
+        _in_flight.clear()
+        yield
+        _search_cache.clear()
+        _in_flight.clear()
+
+    async def test_repeat_query_served_from_cache(self):
+        stub_results = [{"title": "Elwynn", "url": "https://example.com", "snippet": ""}]
+        with patch("src.server._search_sync", return_value=stub_results) as stub:
+            first = await search("Elwynn Forest", max_results=3)
+            second = await search("Elwynn Forest", max_results=3)
+        assert first == second == stub_results
+        stub.assert_called_once()
+
+    async def test_different_limits_cached_separately(self):
+        with patch("src.server._search_sync", return_value=[{"title": "x"}]) as stub:
+            await search("Elwynn Forest", max_results=3)
+            await search("Elwynn Forest", max_results=5)
+        assert stub.call_count == 2
+
+    async def test_concurrent_identical_queries_share_one_call(self):
+        def slow_search(query, max_results):
+            time.sleep(0.05)
+            return [{"title": query}]
+
+        with patch("src.server._search_sync", side_effect=slow_search) as stub:
+            results = await asyncio.gather(*(search("Goldshire") for _ in range(5)))
+        assert all(r == [{"title": "Goldshire"}] for r in results)
+        stub.assert_called_once()
+
+    async def test_empty_results_not_cached(self):
+        with patch("src.server._search_sync", return_value=[]) as stub:
+            await search("Elwynn Forest")
+            await search("Elwynn Forest")
+        assert stub.call_count == 2
+
+    async def test_expired_entry_searched_again(self):
+        with patch("src.server._search_sync", return_value=[{"title": "x"}]) as stub, \
+                patch("src.server.SEARCH_CACHE_TTL", 0.01):
+            await search("Elwynn Forest")
+            await asyncio.sleep(0.02)
+            await search("Elwynn Forest")
+        assert stub.call_count == 2
+
+    async def test_least_recently_used_entry_evicted(self):
+        from src.server import _search_cache
+
+        with patch("src.server._search_sync", side_effect=lambda q, n: [{"title": q}]), \
+                patch("src.server.SEARCH_CACHE_MAX", 2):
+            await search("a")
+            await search("b")
+            await search("a")
+            await search("c")
+        assert [key[1] for key in _search_cache] == ["a", "c"]
+
+    async def test_cache_hits_do_not_spend_rate_limit(self):
+        from src.server import _search_limiter
+
+        with patch("src.server._search_sync", return_value=[{"title": "x"}]), \
+                patch.object(_search_limiter, "acquire", wraps=_search_limiter.acquire) as acquire:
+            await asyncio.gather(*(search("Elwynn Forest") for _ in range(3)))
+            await search("Elwynn Forest")
+        acquire.assert_called_once()
+
+    async def test_cache_disabled_with_zero_ttl(self):
+        with patch("src.server._search_sync", return_value=[{"title": "x"}]) as stub, \
+                patch("src.server.SEARCH_CACHE_TTL", 0):
+            await search("Elwynn Forest")
+            await search("Elwynn Forest")
+        assert stub.call_count == 2
+
+
+class TestRecordedSearches:
+    """On-disk recordings per SEARCH_CACHE_MODE, with the in-memory cache off."""
+
+    @pytest.fixture(autouse=True)
+    def recordings(self, tmp_path):
+        with diskcache.Cache(str(tmp_path / "search-cache")) as cache, \
+                patch("src.server._recorded_searches", cache), \
+                patch("src.server.SEARCH_CACHE_TTL", 0):
+            yield cache
+
+    async def test_enabled_records_then_reads(self):
+        with patch("src.server.SEARCH_CACHE_MODE", "enabled"), \
+                patch("src.server._search_sync", return_value=[{"title": "x"}]) as stub:
+            first = await search("Elwynn Forest")
+            second = await search("Elwynn Forest")
+        assert first == second == [{"title": "x"}]
+        stub.assert_called_once()
+
+    async def test_replay_serves_recording_without_searching(self):
+        with patch("src.server.SEARCH_CACHE_MODE", "enabled"), \
+                patch("src.server._search_news_sync", return_value=[{"title": "x"}]):
+            await search_news("Elwynn Forest", timelimit="d")
+        with patch("src.server.SEARCH_CACHE_MODE", "replay"), \
+                patch("src.server._search_news_sync") as stub:
+            results = await search_news("Elwynn Forest", timelimit="d")
+        assert results == [{"title": "x"}]
+        stub.assert_not_called()
+
+    async def test_replay_miss_raises(self):
+        with patch("src.server.SEARCH_CACHE_MODE", "replay"), \
+                patch("src.server._search_sync") as stub, \
+                pytest.raises(LookupError, match="replay"):
+            await search("Never recorded")
+        stub.assert_not_called()
+
+    async def test_read_only_does_not_record(self, recordings):
+        with patch("src.server.SEARCH_CACHE_MODE", "read_only"), \
+                patch("src.server._search_sync", return_value=[{"title": "x"}]) as stub:
+            await search("Elwynn Forest")
+            await search("Elwynn Forest")
+        assert stub.call_count == 2
+        assert len(recordings) == 0
+
+    async def test_write_only_records_but_always_searches(self, recordings):
+        with patch("src.server.SEARCH_CACHE_MODE", "write_only"), \
+                patch("src.server._search_sync", return_value=[{"title": "x"}]) as stub:
+            await search("Elwynn Forest")
+            await search("Elwynn Forest")
+        assert stub.call_count == 2
+        assert len(recordings) == 1
+
+    async def test_empty_results_not_recorded(self, recordings):
+        with patch("src.server.SEARCH_CACHE_MODE", "enabled"), \
+                patch("src.server._search_sync", return_value=[]):
+            await search("Elwynn Forest")
+        assert len(recordings) == 0
+
+    async def test_disabled_mode_opens_no_cache(self):
+        from src.server import _get_recorded_searches
+
+        with patch("src.server._recorded_searches", None), \
+                patch("src.server.SEARCH_CACHE_MODE", "disabled"):
+            assert _get_recorded_searches() is None
+
+
 class TestServerConfiguration:
     def test_server_name(self):
         assert server.name == "Web Search Service"
@@ -69,3 +293,4 @@ class TestServerConfiguration:
         tool_names = [t.name for t in server._tool_manager.list_tools()]
         assert "search" in tool_names
         assert "search_news" in tool_names
+        assert "search_many" in tool_names
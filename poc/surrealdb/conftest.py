@@ -0,0 +1,17 @@
+"""Pytest setup for the SurrealDB PoC — runs the async tests on uvloop."""
+
+import asyncio
+import sys
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """libuv-based loop for the WebSocket round-trips; uvloop has no Windows build."""
+    if sys.platform == "win32":
+        return asyncio.DefaultEventLoopPolicy()
+
+    import uvloop
+
+    return uvloop.EventLoopPolicy()
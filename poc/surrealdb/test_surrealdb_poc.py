@@ -11,39 +11,258 @@ Tests:
 Prerequisites:
   docker compose -f poc/surrealdb/docker-compose.yml up -d
   pip install -r poc/surrealdb/requirements.txt
+
+Run in parallel with `pytest -n auto poc/surrealdb/`: each pytest-xdist
+worker gets its own database in the namespace, so tests never share data.
+The vector tests build an HNSW index and are marked slow; skip them while
+iterating with `pytest -m "not slow" poc/surrealdb/`.
 """
 
 import asyncio
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
 import pytest
 import pytest_asyncio
-from surrealdb import AsyncSurreal
+from surrealdb import AsyncSurreal, RecordID, Surreal
 
 
 DB_URL = "ws://localhost:8010/rpc"
 DB_NAMESPACE = "mythline_poc"
-DB_DATABASE = "world_lore"
+# One database per xdist worker (world_lore_gw0, ...); plain runs use world_lore
+_XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+DB_DATABASE = f"world_lore_{_XDIST_WORKER}" if _XDIST_WORKER else "world_lore"
 DB_USER = "root"
 DB_PASS = "root"
+DB_POOL_SIZE = 4
+
+
+# Every table and field the tests write, declared up front so the server
+# checks rows against fixed types instead of inferring them per insert.
+# Fields not every test sets are option<...>.
+SCHEMA = """
+    DEFINE TABLE zone SCHEMAFULL;
+    DEFINE FIELD name ON zone TYPE string;
+    DEFINE FIELD game ON zone TYPE option<string>;
+    DEFINE FIELD level_range ON zone TYPE option<object>;
+    DEFINE FIELD level_range.min ON zone TYPE option<int>;
+    DEFINE FIELD level_range.max ON zone TYPE option<int>;
+    DEFINE FIELD narrative_arc ON zone TYPE option<string>;
+    DEFINE FIELD political_climate ON zone TYPE option<string>;
+    DEFINE FIELD access_gating ON zone TYPE option<array<string>>;
+    DEFINE FIELD phase_states ON zone TYPE option<array<object>>;
+    DEFINE FIELD phase_states[*].name ON zone TYPE string;
+    DEFINE FIELD phase_states[*].description ON zone TYPE string;
+    DEFINE FIELD connected_zones ON zone TYPE option<array<string>>;
+    DEFINE FIELD era ON zone TYPE option<string>;
+    DEFINE FIELD confidence ON zone TYPE option<float>;
+
+    DEFINE TABLE npc SCHEMAFULL;
+    DEFINE FIELD name ON npc TYPE string;
+    DEFINE FIELD personality ON npc TYPE option<string>;
+    DEFINE FIELD motivations ON npc TYPE option<array<string>>;
+    DEFINE FIELD quest_threads ON npc TYPE option<array<string>>;
+    DEFINE FIELD role ON npc TYPE option<string>;
+    DEFINE FIELD confidence ON npc TYPE option<float>;
+
+    DEFINE TABLE faction SCHEMAFULL;
+    DEFINE FIELD name ON faction TYPE string;
+    DEFINE FIELD level ON faction TYPE option<string>;
+    DEFINE FIELD ideology ON faction TYPE option<string>;
+    DEFINE FIELD goals ON faction TYPE option<array<string>>;
+    DEFINE FIELD confidence ON faction TYPE option<float>;
+
+    DEFINE TABLE lore SCHEMAFULL;
+    DEFINE FIELD title ON lore TYPE string;
+    DEFINE FIELD category ON lore TYPE string;
+    DEFINE FIELD content ON lore TYPE string;
+    DEFINE FIELD era ON lore TYPE option<string>;
+    DEFINE FIELD confidence ON lore TYPE option<float>;
+
+    DEFINE TABLE narrative_item SCHEMAFULL;
+    DEFINE FIELD name ON narrative_item TYPE string;
+    DEFINE FIELD story_arc ON narrative_item TYPE option<string>;
+    DEFINE FIELD wielder_lineage ON narrative_item TYPE option<array<string>>;
+    DEFINE FIELD power_description ON narrative_item TYPE option<string>;
+    DEFINE FIELD significance ON narrative_item TYPE option<string>;
+    DEFINE FIELD confidence ON narrative_item TYPE option<float>;
+
+    DEFINE TABLE research_state SCHEMAFULL;
+    DEFINE FIELD zone_name ON research_state TYPE string;
+    DEFINE FIELD current_step ON research_state TYPE int;
+    DEFINE FIELD step_data ON research_state FLEXIBLE TYPE option<object>;
+    DEFINE FIELD progression_queue ON research_state TYPE option<array<string>>;
+    DEFINE FIELD priority_queue ON research_state TYPE option<array<string>>;
+    DEFINE FIELD completed_zones ON research_state TYPE option<array<string>>;
+    DEFINE FIELD failed_zones ON research_state TYPE option<array<string>>;
+    DEFINE FIELD daily_tokens_used ON research_state TYPE option<int>;
+    DEFINE FIELD last_reset_date ON research_state TYPE option<string>;
+
+    DEFINE TABLE embedding_test SCHEMAFULL;
+    DEFINE FIELD content ON embedding_test TYPE string;
+    DEFINE FIELD embedding ON embedding_test TYPE array<float, 8>;
+
+    DEFINE TABLE connects_to TYPE RELATION IN zone OUT zone SCHEMAFULL;
+    DEFINE TABLE located_in TYPE RELATION IN npc OUT zone SCHEMAFULL;
+    DEFINE TABLE belongs_to TYPE RELATION IN npc OUT faction SCHEMAFULL;
+    DEFINE TABLE child_of TYPE RELATION IN faction OUT faction SCHEMAFULL;
+    DEFINE TABLE stance_toward TYPE RELATION IN faction OUT faction SCHEMAFULL;
+    DEFINE FIELD stance ON stance_toward TYPE string;
+    DEFINE FIELD strength ON stance_toward TYPE float;
+    DEFINE TABLE relates_to TYPE RELATION IN npc OUT npc SCHEMAFULL;
+    DEFINE FIELD relationship_type ON relates_to TYPE string;
+    DEFINE FIELD description ON relates_to TYPE option<string>;
+"""
+
+# HNSW, as in the Storage MCP schema. KNN against it needs the <|K,EF|>
+# form: plain <|K|> returned no rows on small in-memory tables in earlier
+# runs. docker-compose.yml pins the image (v2.6.2) the PoC was checked on.
+EMBEDDING_INDEX = """
+    DEFINE INDEX IF NOT EXISTS idx_embedding ON embedding_test
+    FIELDS embedding HNSW DIMENSION 8 DIST COSINE TYPE F32 EFC 150 M 24;
+"""
+
+# Parameterized statements: the text stays fixed and only $vars change, so
+# each call sends the values instead of re-inlining them into SurrealQL.
+# The KNN operator's K and EF must be literals.
+KNN_QUERY = """
+    SELECT id, content, vector::distance::knn() AS distance
+    FROM embedding_test
+    WHERE embedding <|2,40|> $q
+    ORDER BY distance
+"""
+
+COSINE_QUERY = """
+    SELECT id, content, vector::similarity::cosine(embedding, $q) AS similarity
+    FROM embedding_test
+    ORDER BY similarity DESC;
+"""
+
+RELATE_LOCATED_IN = "FOR $edge IN $edges { RELATE ($edge.from)->located_in->($edge.to) RETURN NONE; };"
+RELATE_BELONGS_TO = "FOR $edge IN $edges { RELATE ($edge.from)->belongs_to->($edge.to) RETURN NONE; };"
+
+# Built once and shared by every vector test
+EMBEDDING_ELWYNN = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
+EMBEDDING_DUSKWOOD = [0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2, 0.1]
+EMBEDDING_WESTFALL = [0.15, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85]
+QUERY_EMBEDDING = [0.12, 0.22, 0.32, 0.42, 0.52, 0.62, 0.72, 0.82]
+
+
+# Dropping the database discards every table and index at once, instead
+# of deleting rows table by table; the session keeps using the same name,
+# so the recreated database is selected without another USE
+RESET_QUERY = f"""
+    REMOVE DATABASE IF EXISTS {DB_DATABASE};
+    DEFINE DATABASE {DB_DATABASE};
+    {SCHEMA}
+"""
+
+
+class SurrealDBPool:
+    """Signed-in connections handed out to one caller at a time.
+
+    Each connection is its own WebSocket, so queries sent through
+    different connections run concurrently on the server.
+    """
+
+    def __init__(self) -> None:
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._connections: list = []
+
+    async def open(self, size: int) -> None:
+        for _ in range(size):
+            conn = AsyncSurreal(DB_URL)
+            await conn.connect()
+            await conn.signin({"username": DB_USER, "password": DB_PASS})
+            await conn.use(DB_NAMESPACE, DB_DATABASE)
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
 
+    async def close(self) -> None:
+        for conn in self._connections:
+            await conn.close()
 
-@pytest_asyncio.fixture
-async def db():
-    """Create a fresh database connection for each test."""
-    async with AsyncSurreal(DB_URL) as db:
-        await db.signin({"username": DB_USER, "password": DB_PASS})
-        await db.use(DB_NAMESPACE, DB_DATABASE)
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def query(self, sql: str) -> Any:
+        async with self.acquire() as conn:
+            return await conn.query(sql)
+
+    async def create(self, thing: str, data: dict) -> Any:
+        async with self.acquire() as conn:
+            return await conn.create(thing, data)
+
+
+def _one(result: Any) -> Any:
+    """Unwrap a select or query result to its single record."""
+    record = result[0] if isinstance(result, list) else result
+    return record[0] if isinstance(record, list) else record
+
+
+def _rows(result: Any) -> list:
+    """Rows of a SELECT, whether or not wrapped in a per-statement list."""
+    return result[0] if result and isinstance(result[0], list) else result
+
+
+async def _query_all(conn: Any, sql: str, vars: dict | None = None) -> Any:
+    """Run statements in a single request, failing if any of them fails.
+
+    query() only checks and returns the first statement's result, so this
+    reads the raw response and returns the last one's, typically the SELECT.
+    """
+    response = await conn.query_raw(sql, vars)
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    statements = response["result"]
+    for statement in statements:
+        if statement["status"] != "OK":
+            raise RuntimeError(statement["result"])
+    return statements[-1]["result"]
+
+
+async def _transaction(conn: Any, sql: str, vars: dict | None = None) -> Any:
+    """Run statements as one transaction in a single request."""
+    return await _query_all(conn, f"BEGIN TRANSACTION; {sql} COMMIT TRANSACTION;", vars)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def pool():
+    """Open the connection pool for the test run."""
+    pool = SurrealDBPool()
+    await pool.open(DB_POOL_SIZE)
+    yield pool
+    await pool.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def db(pool):
+    """Hold one pooled connection for sequential test steps."""
+    async with pool.acquire() as db:
         yield db
 
 
-@pytest_asyncio.fixture(autouse=True)
+@pytest.fixture(scope="session")
+def sync_db():
+    """Blocking connection for tests that only run one query at a time."""
+    conn = Surreal(DB_URL)
+    conn.signin({"username": DB_USER, "password": DB_PASS})
+    conn.use(DB_NAMESPACE, DB_DATABASE)
+    yield conn
+    conn.close()
+
+
+@pytest_asyncio.fixture(autouse=True, loop_scope="session")
 async def clean_db(db):
-    """Clean up tables before each test to ensure isolation."""
-    tables = ["zone", "npc", "faction", "lore", "narrative_item",
-              "connects_to", "belongs_to", "located_in", "relates_to",
-              "child_of", "stance_toward", "found_in", "about",
-              "research_state", "embedding_test"]
-    for table in tables:
-        await db.query(f"DELETE FROM {table};")
+    """Start each test on an empty database with the schema defined."""
+    await _query_all(db, RESET_QUERY)
     yield
 
 
@@ -60,10 +279,14 @@ class TestConnection:
 
 
 class TestCRUD:
-    """Test 2: CRUD operations on World Lore schema tables."""
+    """Test 2: CRUD operations on World Lore schema tables.
+
+    Single-row steps in sequence, so they use the blocking driver; only
+    test_query_filter fans out and stays async.
+    """
 
-    async def test_create_zone(self, db):
-        zone = await db.create("zone:elwynn_forest", {
+    def test_create_zone(self, sync_db):
+        zone = sync_db.create("zone:elwynn_forest", {
             "name": "Elwynn Forest",
             "game": "wow",
             "level_range": {"min": 1, "max": 10},
@@ -81,35 +304,34 @@ class TestCRUD:
         assert zone is not None
         assert zone["name"] == "Elwynn Forest"
 
-    async def test_read_zone(self, db):
-        await db.create("zone:elwynn_forest", {
+    def test_read_zone(self, sync_db):
+        sync_db.create("zone:elwynn_forest", {
             "name": "Elwynn Forest",
             "game": "wow",
             "level_range": {"min": 1, "max": 10},
         })
-        result = await db.select("zone:elwynn_forest")
-        zone = result[0] if isinstance(result, list) else result
+        result = sync_db.select("zone:elwynn_forest")
+        zone = _one(result)
         assert zone["name"] == "Elwynn Forest"
         assert zone["level_range"]["min"] == 1
 
-    async def test_update_zone(self, db):
-        await db.create("zone:elwynn_forest", {
+    def test_update_zone(self, sync_db):
+        sync_db.create("zone:elwynn_forest", {
             "name": "Elwynn Forest",
             "confidence": 0.7,
         })
-        await db.merge("zone:elwynn_forest", {"confidence": 0.95})
-        result = await db.select("zone:elwynn_forest")
-        zone = result[0] if isinstance(result, list) else result
+        sync_db.merge("zone:elwynn_forest", {"confidence": 0.95})
+        result = sync_db.select("zone:elwynn_forest")
+        zone = _one(result)
         assert zone["confidence"] == 0.95
 
-    async def test_delete_zone(self, db):
-        await db.create("zone:elwynn_forest", {"name": "Elwynn Forest"})
-        await db.delete("zone:elwynn_forest")
-        result = await db.query("SELECT * FROM zone WHERE id = zone:elwynn_forest;")
-        assert len(result) == 0 or (isinstance(result, list) and len(result[0].get("result", result)) == 0) or result == [None] or result == [[]]
+    def test_delete_zone(self, sync_db):
+        sync_db.create("zone:elwynn_forest", {"name": "Elwynn Forest"})
+        sync_db.delete("zone:elwynn_forest")
+        assert not sync_db.select("zone:elwynn_forest")
 
-    async def test_create_npc(self, db):
-        npc = await db.create("npc:marshal_dughan", {
+    def test_create_npc(self, sync_db):
+        npc = sync_db.create("npc:marshal_dughan", {
             "name": "Marshal Dughan",
             "personality": "Dutiful, weary, pragmatic",
             "motivations": ["Protect Goldshire", "Maintain order in Elwynn"],
@@ -120,8 +342,8 @@ class TestCRUD:
         assert npc["name"] == "Marshal Dughan"
         assert "quest_giver" == npc["role"]
 
-    async def test_create_faction(self, db):
-        faction = await db.create("faction:stormwind", {
+    def test_create_faction(self, sync_db):
+        faction = sync_db.create("faction:stormwind", {
             "name": "Stormwind",
             "level": "major_faction",
             "ideology": "Human kingdom, bastion of the Alliance",
@@ -130,8 +352,8 @@ class TestCRUD:
         })
         assert faction["name"] == "Stormwind"
 
-    async def test_create_lore(self, db):
-        lore = await db.create("lore:first_war", {
+    def test_create_lore(self, sync_db):
+        lore = sync_db.create("lore:first_war", {
             "title": "The First War",
             "category": "history",
             "content": "The conflict that began when orcs invaded Azeroth through the Dark Portal",
@@ -140,8 +362,8 @@ class TestCRUD:
         })
         assert lore["title"] == "The First War"
 
-    async def test_create_narrative_item(self, db):
-        item = await db.create("narrative_item:ashbringer", {
+    def test_create_narrative_item(self, sync_db):
+        item = sync_db.create("narrative_item:ashbringer", {
             "name": "Ashbringer",
             "story_arc": "A legendary blade forged to destroy the undead, corrupted and later purified",
             "wielder_lineage": ["Alexandros Mograine", "Renault Mograine", "Darion Mograine", "Tirion Fordring"],
@@ -152,161 +374,176 @@ class TestCRUD:
         assert item["name"] == "Ashbringer"
         assert len(item["wielder_lineage"]) == 4
 
-    async def test_query_filter(self, db):
-        await db.create("zone:elwynn_forest", {"name": "Elwynn Forest", "game": "wow", "confidence": 0.95})
-        await db.create("zone:westfall", {"name": "Westfall", "game": "wow", "confidence": 0.6})
-        await db.create("zone:duskwood", {"name": "Duskwood", "game": "wow", "confidence": 0.85})
+    async def test_query_filter(self, db, pool):
+        await asyncio.gather(
+            pool.create("zone:elwynn_forest", {"name": "Elwynn Forest", "game": "wow", "confidence": 0.95}),
+            pool.create("zone:westfall", {"name": "Westfall", "game": "wow", "confidence": 0.6}),
+            pool.create("zone:duskwood", {"name": "Duskwood", "game": "wow", "confidence": 0.85}),
+        )
 
         result = await db.query("SELECT * FROM zone WHERE confidence >= 0.8;")
-        high_confidence = result[0] if isinstance(result[0], list) else result
+        high_confidence = _rows(result)
         assert len(high_confidence) == 2
 
 
-class TestGraphRelationships:
-    """Test 3: Graph relationships — RELATE and traversal."""
+# Graph test data, created at the start of each graph test's transaction
+_SETUP_GRAPH_SQL = """
+    CREATE zone:elwynn_forest SET name = 'Elwynn Forest' RETURN NONE;
+    CREATE zone:westfall SET name = 'Westfall' RETURN NONE;
+    CREATE zone:stormwind_city SET name = 'Stormwind City' RETURN NONE;
+    CREATE zone:redridge_mountains SET name = 'Redridge Mountains' RETURN NONE;
 
-    async def _setup_graph(self, db):
-        """Create test data for graph queries."""
-        await db.create("zone:elwynn_forest", {"name": "Elwynn Forest"})
-        await db.create("zone:westfall", {"name": "Westfall"})
-        await db.create("zone:stormwind_city", {"name": "Stormwind City"})
-        await db.create("zone:redridge_mountains", {"name": "Redridge Mountains"})
+    CREATE npc:marshal_dughan SET name = 'Marshal Dughan', role = 'quest_giver' RETURN NONE;
+    CREATE npc:gryan_stoutmantle SET name = 'Gryan Stoutmantle', role = 'quest_giver' RETURN NONE;
 
-        await db.create("npc:marshal_dughan", {"name": "Marshal Dughan", "role": "quest_giver"})
-        await db.create("npc:gryan_stoutmantle", {"name": "Gryan Stoutmantle", "role": "quest_giver"})
+    CREATE faction:stormwind SET name = 'Stormwind', level = 'major_faction' RETURN NONE;
+    CREATE faction:peoples_militia SET name = "People's Militia", level = 'guild' RETURN NONE;
+"""
 
-        await db.create("faction:stormwind", {"name": "Stormwind", "level": "major_faction"})
-        await db.create("faction:peoples_militia", {"name": "People's Militia", "level": "guild"})
 
-    async def test_relate_zone_connections(self, db):
-        await self._setup_graph(db)
+class TestGraphRelationships:
+    """Test 3: Graph relationships — RELATE and traversal.
 
-        await db.query("RELATE zone:elwynn_forest->connects_to->zone:westfall;")
-        await db.query("RELATE zone:elwynn_forest->connects_to->zone:stormwind_city;")
-        await db.query("RELATE zone:elwynn_forest->connects_to->zone:redridge_mountains;")
+    Each test sends the graph setup, its edges and its SELECT as one
+    transaction, so the server gets a single request.
+    """
 
-        result = await db.query("SELECT ->connects_to->zone.name FROM zone:elwynn_forest;")
-        connected = result[0] if isinstance(result[0], list) else [result[0]]
+    async def _graph_query(self, db, sql, vars=None):
+        """Create the test graph, then run sql in the same transaction."""
+        return await _transaction(db, f"{_SETUP_GRAPH_SQL} {sql}", vars)
+
+    async def test_relate_zone_connections(self, db):
+        result = await self._graph_query(db, """
+            RELATE zone:elwynn_forest->connects_to->zone:westfall RETURN NONE;
+            RELATE zone:elwynn_forest->connects_to->zone:stormwind_city RETURN NONE;
+            RELATE zone:elwynn_forest->connects_to->zone:redridge_mountains RETURN NONE;
+            SELECT ->connects_to->zone.name FROM zone:elwynn_forest;
+        """)
+        connected = _rows(result)
         assert len(connected) > 0
 
     async def test_relate_npc_to_zone(self, db):
-        await self._setup_graph(db)
-
-        await db.query("RELATE npc:marshal_dughan->located_in->zone:elwynn_forest;")
-        await db.query("RELATE npc:gryan_stoutmantle->located_in->zone:westfall;")
-
-        result = await db.query("SELECT ->located_in->zone.name FROM npc:marshal_dughan;")
+        result = await self._graph_query(db, f"""
+            {RELATE_LOCATED_IN}
+            SELECT ->located_in->zone.name FROM npc:marshal_dughan;
+        """, {"edges": [
+            {"from": RecordID("npc", "marshal_dughan"), "to": RecordID("zone", "elwynn_forest")},
+            {"from": RecordID("npc", "gryan_stoutmantle"), "to": RecordID("zone", "westfall")},
+        ]})
         assert result is not None
 
     async def test_relate_npc_to_faction(self, db):
-        await self._setup_graph(db)
-
-        await db.query("RELATE npc:marshal_dughan->belongs_to->faction:stormwind;")
-        await db.query("RELATE npc:gryan_stoutmantle->belongs_to->faction:peoples_militia;")
-
-        result = await db.query("SELECT <-belongs_to<-npc.name FROM faction:stormwind;")
+        result = await self._graph_query(db, f"""
+            {RELATE_BELONGS_TO}
+            SELECT <-belongs_to<-npc.name FROM faction:stormwind;
+        """, {"edges": [
+            {"from": RecordID("npc", "marshal_dughan"), "to": RecordID("faction", "stormwind")},
+            {"from": RecordID("npc", "gryan_stoutmantle"), "to": RecordID("faction", "peoples_militia")},
+        ]})
         assert result is not None
 
     async def test_relate_faction_hierarchy(self, db):
-        await self._setup_graph(db)
-
-        await db.query("RELATE faction:peoples_militia->child_of->faction:stormwind;")
-
-        result = await db.query("SELECT ->child_of->faction.name FROM faction:peoples_militia;")
+        result = await self._graph_query(db, """
+            RELATE faction:peoples_militia->child_of->faction:stormwind RETURN NONE;
+            SELECT ->child_of->faction.name FROM faction:peoples_militia;
+        """)
         assert result is not None
 
     async def test_relate_with_properties(self, db):
-        await self._setup_graph(db)
-
-        await db.query("""
+        result = await self._graph_query(db, """
             RELATE faction:stormwind->stance_toward->faction:peoples_militia
-            SET stance = 'allied', strength = 0.8;
+            SET stance = 'allied', strength = 0.8
+            RETURN NONE;
+            SELECT * FROM stance_toward;
         """)
-
-        result = await db.query("SELECT * FROM stance_toward;")
-        edges = result[0] if isinstance(result[0], list) else result
+        edges = _rows(result)
         assert len(edges) > 0
 
     async def test_reverse_traversal(self, db):
-        await self._setup_graph(db)
-        await db.query("RELATE zone:westfall->connects_to->zone:elwynn_forest;")
-
-        result = await db.query("SELECT <-connects_to<-zone.name FROM zone:elwynn_forest;")
+        result = await self._graph_query(db, """
+            RELATE zone:westfall->connects_to->zone:elwynn_forest RETURN NONE;
+            SELECT <-connects_to<-zone.name FROM zone:elwynn_forest;
+        """)
         assert result is not None
 
     async def test_npc_relationships(self, db):
-        await db.create("npc:anduin", {"name": "Anduin Wrynn"})
-        await db.create("npc:varian", {"name": "Varian Wrynn"})
-
-        await db.query("""
+        result = await _transaction(db, """
+            CREATE npc:anduin SET name = 'Anduin Wrynn' RETURN NONE;
+            CREATE npc:varian SET name = 'Varian Wrynn' RETURN NONE;
             RELATE npc:varian->relates_to->npc:anduin
-            SET relationship_type = 'father', description = 'Father and son, Kings of Stormwind';
+            SET relationship_type = 'father', description = 'Father and son, Kings of Stormwind'
+            RETURN NONE;
+            SELECT ->relates_to->(npc WHERE true).name FROM npc:varian;
         """)
-
-        result = await db.query("SELECT ->relates_to->(npc WHERE true).name FROM npc:varian;")
         assert result is not None
 
 
+@pytest.mark.slow
 class TestVectorSearch:
-    """Test 4: Vector search — HNSW index and KNN queries."""
+    """Test 4: Vector search — HNSW index and KNN queries.
+
+    The tests only read, so the class shares one dataset instead of
+    resetting the database and re-inserting the rows for every test.
+    """
+
+    @pytest_asyncio.fixture(autouse=True, loop_scope="session")
+    async def clean_db(self, embedding_dataset):
+        """Skip the per-test reset; vector_index resets once per class."""
+        yield
+
+    @pytest_asyncio.fixture(scope="class", loop_scope="session")
+    async def vector_index(self, db):
+        """Reset the database and build the HNSW index, once for the class."""
+        await _query_all(db, RESET_QUERY)
+        await db.query(EMBEDDING_INDEX)
+        yield
+
+    @pytest_asyncio.fixture(scope="class", loop_scope="session")
+    async def embedding_dataset(self, db, vector_index):
+        """Insert the three zone embeddings once."""
+        # Rows travel as a $rows parameter, so the vectors are sent as
+        # binary-encoded numbers instead of digits in the query text
+        await db.query("INSERT INTO embedding_test $rows RETURN NONE;", {"rows": [
+            {"id": RecordID("embedding_test", "zone_elwynn"), "content": "Elwynn Forest is a peaceful starting zone for humans",
+             "embedding": EMBEDDING_ELWYNN},
+            {"id": RecordID("embedding_test", "zone_duskwood"), "content": "Duskwood is a dark and haunted forest zone",
+             "embedding": EMBEDDING_DUSKWOOD},
+            {"id": RecordID("embedding_test", "zone_westfall"), "content": "Westfall is a desolate farmland zone west of Elwynn",
+             "embedding": EMBEDDING_WESTFALL},
+        ]})
+        yield
 
     async def test_create_vector_index(self, db):
-        await db.query("""
-            DEFINE INDEX idx_embedding ON embedding_test
-            FIELDS embedding MTREE DIMENSION 8 DIST COSINE TYPE F32;
-        """)
-
+        # Defined once by vector_index, not per test
         result = await db.query("INFO FOR TABLE embedding_test;")
-        assert result is not None
+        assert "idx_embedding" in str(result)
 
     async def test_insert_vectors(self, db):
-        await db.query("""
-            DEFINE INDEX idx_embedding ON embedding_test
-            FIELDS embedding MTREE DIMENSION 8 DIST COSINE TYPE F32;
-        """)
-
-        await db.query("CREATE embedding_test:zone_elwynn SET content = 'Elwynn Forest is a peaceful starting zone for humans', embedding = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8];")
-        await db.query("CREATE embedding_test:zone_duskwood SET content = 'Duskwood is a dark and haunted forest zone', embedding = [0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2, 0.1];")
-        await db.query("CREATE embedding_test:zone_westfall SET content = 'Westfall is a desolate farmland zone west of Elwynn', embedding = [0.15, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85];")
-
         result = await db.query("SELECT * FROM embedding_test;")
-        records = result[0] if isinstance(result[0], list) else result
+        records = _rows(result)
         assert len(records) == 3
 
-    async def test_knn_search_with_mtree(self, db):
-        """KNN search works with MTREE index when data is inserted via SurrealQL."""
-        await db.query("DEFINE INDEX idx_embedding ON embedding_test FIELDS embedding MTREE DIMENSION 8 DIST COSINE TYPE F32;")
-
-        await db.query("CREATE embedding_test:zone_elwynn SET content = 'Elwynn Forest', embedding = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8];")
-        await db.query("CREATE embedding_test:zone_duskwood SET content = 'Duskwood', embedding = [0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2, 0.1];")
-        await db.query("CREATE embedding_test:zone_westfall SET content = 'Westfall', embedding = [0.15, 0.25, 0.35, 0.45, 0.55, 0.65, 0.75, 0.85];")
+    async def test_knn_search_with_hnsw(self, db):
+        """KNN search works with the HNSW index when data is inserted via SurrealQL."""
+        result = await db.query(f"{KNN_QUERY};", {"q": QUERY_EMBEDDING})
 
-        result = await db.query("""
-            SELECT id, content, vector::distance::knn() AS distance
-            FROM embedding_test
-            WHERE embedding <|2|> [0.12, 0.22, 0.32, 0.42, 0.52, 0.62, 0.72, 0.82]
-            ORDER BY distance;
-        """)
-
-        matches = result[0] if isinstance(result, list) and len(result) > 0 and isinstance(result[0], list) else result
+        matches = _rows(result)
         assert len(matches) >= 2
         first_id = str(matches[0]["id"])
         assert "elwynn" in first_id or "westfall" in first_id
 
+    async def test_knn_search_uses_hnsw_index(self, db):
+        """The query plan iterates idx_embedding rather than scanning the table."""
+        plan = await db.query(f"{KNN_QUERY} EXPLAIN;", {"q": QUERY_EMBEDDING})
+        assert "idx_embedding" in str(plan)
+        assert "Iterate Table" not in str(plan)
+
     async def test_cosine_similarity_search(self, db):
-        await db.query("CREATE embedding_test:zone_elwynn SET content = 'Elwynn Forest', embedding = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8];")
-        await db.query("CREATE embedding_test:zone_duskwood SET content = 'Duskwood', embedding = [0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2, 0.1];")
-
-        result = await db.query("""
-            SELECT id, content,
-                   vector::similarity::cosine(embedding, [0.12, 0.22, 0.32, 0.42, 0.52, 0.62, 0.72, 0.82]) AS similarity
-            FROM embedding_test
-            ORDER BY similarity DESC;
-        """)
+        result = await db.query(COSINE_QUERY, {"q": QUERY_EMBEDDING})
 
-        matches = result[0] if isinstance(result, list) and len(result) > 0 and isinstance(result[0], list) else result
-        assert len(matches) == 2
-        assert matches[0]["similarity"] > matches[1]["similarity"]
+        matches = _rows(result)
+        assert len(matches) == 3
+        assert matches[0]["similarity"] > matches[1]["similarity"] > matches[2]["similarity"]
         first_id = str(matches[0]["id"])
         assert "elwynn" in first_id
 
@@ -336,7 +573,7 @@ class TestCheckpointState:
             "progression_queue": ["westfall", "redridge_mountains"],
         })
         result = await db.select("research_state:current")
-        checkpoint = result[0] if isinstance(result, list) else result
+        checkpoint = _one(result)
         assert checkpoint["zone_name"] == "elwynn_forest"
         assert checkpoint["current_step"] == 4
         assert len(checkpoint["progression_queue"]) == 2
@@ -352,7 +589,7 @@ class TestCheckpointState:
             "daily_tokens_used": 12000,
         })
         result = await db.select("research_state:current")
-        checkpoint = result[0] if isinstance(result, list) else result
+        checkpoint = _one(result)
         assert checkpoint["current_step"] == 7
         assert checkpoint["daily_tokens_used"] == 12000
 
@@ -361,33 +598,41 @@ class TestComplexQueries:
     """Test 6: Complex queries that the agents will need."""
 
     async def test_query_npcs_by_zone_via_graph(self, db):
-        await db.create("zone:elwynn_forest", {"name": "Elwynn Forest"})
-        await db.create("npc:marshal_dughan", {"name": "Marshal Dughan", "role": "quest_giver"})
-        await db.create("npc:smith_argus", {"name": "Smith Argus", "role": "vendor"})
-        await db.query("RELATE npc:marshal_dughan->located_in->zone:elwynn_forest;")
-        await db.query("RELATE npc:smith_argus->located_in->zone:elwynn_forest;")
-
-        result = await db.query("SELECT <-located_in<-npc.* FROM zone:elwynn_forest;")
+        # The loop runs on the server; only the NPC list crosses the wire
+        result = await _transaction(db, """
+            CREATE zone:elwynn_forest SET name = 'Elwynn Forest' RETURN NONE;
+            FOR $npc IN $npcs {
+                CREATE $npc.id SET name = $npc.name, role = $npc.role RETURN NONE;
+                RELATE ($npc.id)->located_in->zone:elwynn_forest RETURN NONE;
+            };
+            SELECT <-located_in<-npc.* FROM zone:elwynn_forest;
+        """, {"npcs": [
+            {"id": RecordID("npc", "marshal_dughan"), "name": "Marshal Dughan", "role": "quest_giver"},
+            {"id": RecordID("npc", "smith_argus"), "name": "Smith Argus", "role": "vendor"},
+        ]})
         assert result is not None
 
     async def test_query_faction_members(self, db):
-        await db.create("faction:stormwind", {"name": "Stormwind"})
-        await db.create("npc:marshal_dughan", {"name": "Marshal Dughan"})
-        await db.create("npc:guard_thomas", {"name": "Guard Thomas"})
-        await db.query("RELATE npc:marshal_dughan->belongs_to->faction:stormwind;")
-        await db.query("RELATE npc:guard_thomas->belongs_to->faction:stormwind;")
-
-        result = await db.query("SELECT <-belongs_to<-npc.name FROM faction:stormwind;")
+        result = await _transaction(db, """
+            CREATE faction:stormwind SET name = 'Stormwind' RETURN NONE;
+            FOR $npc IN $npcs {
+                CREATE $npc.id SET name = $npc.name RETURN NONE;
+                RELATE ($npc.id)->belongs_to->faction:stormwind RETURN NONE;
+            };
+            SELECT <-belongs_to<-npc.name FROM faction:stormwind;
+        """, {"npcs": [
+            {"id": RecordID("npc", "marshal_dughan"), "name": "Marshal Dughan"},
+            {"id": RecordID("npc", "guard_thomas"), "name": "Guard Thomas"},
+        ]})
         assert result is not None
 
     async def test_multi_hop_traversal(self, db):
-        await db.create("zone:elwynn_forest", {"name": "Elwynn Forest"})
-        await db.create("zone:westfall", {"name": "Westfall"})
-        await db.create("zone:duskwood", {"name": "Duskwood"})
-        await db.query("RELATE zone:elwynn_forest->connects_to->zone:westfall;")
-        await db.query("RELATE zone:westfall->connects_to->zone:duskwood;")
-
-        result = await db.query(
-            "SELECT ->connects_to->zone->connects_to->zone.name FROM zone:elwynn_forest;"
-        )
-        assert result is not None
+        result = await _transaction(db, """
+            CREATE zone:elwynn_forest SET name = 'Elwynn Forest' RETURN NONE;
+            CREATE zone:westfall SET name = 'Westfall' RETURN NONE;
+            CREATE zone:duskwood SET name = 'Duskwood' RETURN NONE;
+            RELATE zone:elwynn_forest->connects_to->zone:westfall RETURN NONE;
+            RELATE zone:westfall->connects_to->zone:duskwood RETURN NONE;
+            SELECT ->connects_to->zone->connects_to->zone.name AS hop2 FROM zone:elwynn_forest;
+        """)
+        assert _rows(result)[0]["hop2"] == ["Duskwood"]